@@ -0,0 +1,139 @@
+'''
+Sequential sampling of the speech files: the speech files are transcribed in a random, stratified order, and an ASR
+engine stops receiving audio as soon as the confidence interval of its WER is narrow enough, or clearly separated
+from the confidence intervals of the other ASR engines.
+'''
+
+import collections
+import math
+import random
+
+
+def stratified_order(strata, seed=None):
+    '''
+    Returns all the items of strata (dictionary mapping each stratum to a list of items) in a random order
+    such that each prefix of the order contains the strata in roughly the same proportions as the whole.
+
+    Each stratum is shuffled, and its k-th item out of n is placed at the position (k + u) / n in [0, 1),
+    where u is uniformly drawn in [0, 1).
+    '''
+    random_generator = random.Random(seed)
+    keyed_items = []
+    for stratum in sorted(strata):
+        items = list(strata[stratum])
+        random_generator.shuffle(items)
+        for item_number, item in enumerate(items):
+            keyed_items.append(((item_number + random_generator.random()) / len(items), item))
+    keyed_items.sort(key=lambda keyed_item: keyed_item[0])
+    return [item for key, item in keyed_items]
+
+
+def normal_quantile(probability):
+    '''
+    Inverse of the cumulative distribution function of the standard normal distribution, by bisection on math.erf
+    (statistics.NormalDist requires Python 3.8).
+
+    >>> round(normal_quantile(0.975), 4)
+    1.96
+    '''
+    lower_bound, upper_bound = -40.0, 40.0
+    for _ in range(100):
+        middle = (lower_bound + upper_bound) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < probability:
+            lower_bound = middle
+        else:
+            upper_bound = middle
+    return (lower_bound + upper_bound) / 2
+
+
+class WerEstimate(object):
+    '''
+    Running estimate of the WER of an ASR engine, i.e. the ratio between the total number of changes and the total
+    number of tokens in the gold transcriptions, with a confidence interval based on the standard error of a ratio estimator.
+    '''
+
+    def __init__(self, confidence=0.95):
+        self.z = normal_quantile(0.5 + confidence / 2)
+        self.number_of_files = 0
+        self.sum_of_changes = 0
+        self.sum_of_tokens = 0
+        # Sums used to compute the variance of the residuals changes - wer * tokens in one pass
+        self.sum_of_squared_changes = 0
+        self.sum_of_squared_tokens = 0
+        self.sum_of_changes_times_tokens = 0
+
+    def update(self, number_of_changes, number_of_tokens_in_gold):
+        self.number_of_files += 1
+        self.sum_of_changes += number_of_changes
+        self.sum_of_tokens += number_of_tokens_in_gold
+        self.sum_of_squared_changes += number_of_changes ** 2
+        self.sum_of_squared_tokens += number_of_tokens_in_gold ** 2
+        self.sum_of_changes_times_tokens += number_of_changes * number_of_tokens_in_gold
+
+    def get_wer(self):
+        return self.sum_of_changes / max(self.sum_of_tokens, 1)
+
+    def get_confidence_interval(self):
+        '''
+        Returns the lower and upper bounds of the confidence interval of the WER.
+        '''
+        wer = self.get_wer()
+        if self.number_of_files < 2:
+            return 0, math.inf
+        sum_of_squared_residuals = (self.sum_of_squared_changes - 2 * wer * self.sum_of_changes_times_tokens
+                                    + wer ** 2 * self.sum_of_squared_tokens)
+        mean_number_of_tokens = self.sum_of_tokens / self.number_of_files
+        variance = max(sum_of_squared_residuals, 0) / (self.number_of_files * (self.number_of_files - 1) * max(mean_number_of_tokens, 1e-9) ** 2)
+        half_width = self.z * math.sqrt(variance)
+        return max(wer - half_width, 0), wer + half_width
+
+
+class AdaptiveSampler(object):
+    '''
+    Keeps a WerEstimate per ASR engine, and decides which ASR engines still need more speech files.
+    '''
+
+    def __init__(self, asr_systems, target_confidence_interval_width, min_number_of_files, confidence=0.95):
+        self.estimates = collections.OrderedDict((asr_system, WerEstimate(confidence)) for asr_system in asr_systems)
+        self.target_confidence_interval_width = target_confidence_interval_width
+        self.min_number_of_files = min_number_of_files
+        self.stopping_reasons = {}
+
+    def update(self, asr_system, number_of_changes, number_of_tokens_in_gold):
+        self.estimates[asr_system].update(number_of_changes, number_of_tokens_in_gold)
+        self._check_stopping_criteria(asr_system)
+
+    def _check_stopping_criteria(self, asr_system):
+        estimate = self.estimates[asr_system]
+        if asr_system in self.stopping_reasons or estimate.number_of_files < self.min_number_of_files:
+            return
+        lower_bound, upper_bound = estimate.get_confidence_interval()
+        if upper_bound - lower_bound <= self.target_confidence_interval_width:
+            self.stopping_reasons[asr_system] = 'precise enough'
+            return
+        if len(self.estimates) < 2: return
+        for other_asr_system, other_estimate in self.estimates.items():
+            if other_asr_system == asr_system: continue
+            other_lower_bound, other_upper_bound = other_estimate.get_confidence_interval()
+            if lower_bound <= other_upper_bound and other_lower_bound <= upper_bound:
+                return
+        self.stopping_reasons[asr_system] = 'separated from the other ASR engines'
+
+    def get_active_asr_systems(self):
+        '''
+        Returns the ASR engines that should receive the next speech file.
+        '''
+        return [asr_system for asr_system in self.estimates if asr_system not in self.stopping_reasons]
+
+    def get_summary(self):
+        '''
+        Returns a list of dictionaries, one per ASR engine, with its WER estimate and confidence interval.
+        '''
+        summary = []
+        for asr_system, estimate in self.estimates.items():
+            lower_bound, upper_bound = estimate.get_confidence_interval()
+            summary.append({'service': asr_system, 'files': estimate.number_of_files, 'len': estimate.sum_of_tokens,
+                            'changes': estimate.sum_of_changes, 'wer': estimate.get_wer(),
+                            'wer_lower_bound': lower_bound, 'wer_upper_bound': upper_bound,
+                            'stopping_reason': self.stopping_reasons.get(asr_system, 'no more speech files')})
+        return summary
@@ -0,0 +1,82 @@
+'''
+Amazon Lex plugin of the benchmark, see engines.py.
+To use Amazon Lex, you need to install the Python package: pip install boto3
+'''
+
+import threading
+
+import speech_recognition as sr
+import utils
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Amazon Lex.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    try:
+        bot_name = settings.get('credentials','amazon_bot_name')
+        bot_alias = settings.get('credentials','amazon_bot_alias')
+        user_id = settings.get('credentials','amazon_user_id')
+        transcription,transcription_json = recognize_amazon(audio, bot_name, bot_alias, user_id,
+                 content_type="audio/l16; rate=16000; channels=1", access_key_id=settings.get('credentials','amazon_access_key_id'),
+                 secret_access_key=settings.get('credentials','amazon_secret_access_key'), region=settings.get('credentials','amazon_region'))
+        transcription_json['audioStream'] = ''
+    except sr.UnknownValueError:
+        utils.log("Amazon not process the speech transcription request")
+
+    return transcription, transcription_json, asr_could_not_be_reached
+
+
+def recognize_amazon(audio_data, bot_name, bot_alias, user_id,
+                     content_type="audio/l16; rate=16000; channels=1", access_key_id=None, secret_access_key=None, region=None):
+    """
+    Performs speech recognition on ``audio_data`` (an ``AudioData`` instance).
+
+    If access_key_id or secret_access_key is not set it will go through the list in the link below
+    http://boto3.readthedocs.io/en/latest/guide/configuration.html#configuring-credentials
+
+    Author: Patrick Artounian (https://github.com/partounian)
+    Source: https://github.com/Uberi/speech_recognition/pull/331
+    """
+    assert isinstance(audio_data, sr.AudioData), "Data must be audio data"
+    assert isinstance(bot_name, str), "``bot_name`` must be a string"
+    assert isinstance(bot_alias, str), "``bot_alias`` must be a string"
+    assert isinstance(user_id, str), "``user_id`` must be a string"
+    assert isinstance(content_type, str), "``content_type`` must be a string"
+    assert access_key_id is None or isinstance(access_key_id, str), "``access_key_id`` must be a string"
+    assert secret_access_key is None or isinstance(secret_access_key, str), "``secret_access_key`` must be a string"
+    assert region is None or isinstance(region, str), "``region`` must be a string"
+
+    try:
+        import boto3
+    except ImportError:
+        raise sr.RequestError("missing boto3 module: ensure that boto3 is set up correctly.")
+
+    # boto3 clients are thread-safe: build one per set of credentials and reuse it (e.g. across the jobs of service.py)
+    client_key = (access_key_id, secret_access_key, region)
+    with _clients_lock:
+        if client_key not in _clients:
+            _clients[client_key] = boto3.client('lex-runtime', aws_access_key_id=access_key_id,
+                                                aws_secret_access_key=secret_access_key,
+                                                region_name=region)
+        client = _clients[client_key]
+
+    raw_data = audio_data.get_raw_data(
+        convert_rate=16000, convert_width=2
+    )
+    if isinstance(raw_data, memoryview): raw_data = raw_data.tobytes()  # audio read from the PCM cache
+
+    accept = "text/plain; charset=utf-8"
+    response = client.post_content(botName=bot_name, botAlias=bot_alias, userId=user_id,
+                                   contentType=content_type, accept=accept, inputStream=raw_data)
+
+    if not response["inputTranscript"]:
+        raise sr.UnknownValueError()
+
+    return response["inputTranscript"], response
@@ -0,0 +1,90 @@
+'''
+DeepSpeech plugin of the benchmark, see engines.py.
+DeepSpeech is called through the command line given by the setting `cmdline` of the section [deepspeech], e.g. run_freespeech5.sh,
+or, if the setting `model_filepath` is not empty, in-process with the deepspeech Python package (pip install deepspeech):
+the model is then loaded only once, instead of once per speech file.
+'''
+
+import threading
+
+import speech_recognition as sr
+import utils
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using DeepSpeech.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    try:
+        deepspeech_model_filepath = settings.get('deepspeech','model_filepath')
+        if deepspeech_model_filepath != '':
+            transcription,transcription_json = recognize_deepspeech_in_process(audio, deepspeech_model_filepath,
+                                                                                settings.get('deepspeech','scorer_filepath'))
+        else:
+            deepspeech_cmdline = settings.get('deepspeech','cmdline')
+            transcription,transcription_json = recognize_deepspeech(audio, deepspeech_cmdline)
+    except:
+        utils.log('Deepspeech encountered some issue')
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
+
+
+def recognize_deepspeech(audio_data, cmdline):
+    """
+    Author: Misha Jiline (https://github.com/mjiline)
+    """
+    assert isinstance(audio_data, sr.AudioData), "Data must be audio data"
+    assert isinstance(cmdline, str), "``cmdline`` must be a string"
+
+    try:
+        import tempfile
+        import subprocess
+        from subprocess import PIPE
+    except ImportError:
+        raise sr.RequestError("missing tempfile module")
+
+    raw_data = audio_data.get_wav_data(
+        convert_rate=16000, convert_width=2
+    )
+
+    with tempfile.NamedTemporaryFile(suffix='.wav') as fp:
+        fp.write(raw_data)
+        fp.seek(0)
+        transcript = subprocess.run(
+            "exec %s --audio %s" % (cmdline, fp.name), shell=True, stdout=PIPE, stderr=PIPE).stdout
+        transcript = transcript.decode('utf-8')
+
+    return transcript, {}
+
+
+def get_model(model_filepath, scorer_filepath=''):
+    '''
+    Returns the DeepSpeech model of model_filepath, loading it on first use, and a lock to use it from one thread at a time.
+    '''
+    with _models_lock:
+        if (model_filepath, scorer_filepath) not in _models:
+            import deepspeech
+            model = deepspeech.Model(model_filepath)
+            if scorer_filepath != '':
+                model.enableExternalScorer(scorer_filepath)
+            _models[(model_filepath, scorer_filepath)] = (model, threading.Lock())
+        return _models[(model_filepath, scorer_filepath)]
+
+
+def recognize_deepspeech_in_process(audio_data, model_filepath, scorer_filepath=''):
+    '''
+    Recognize audio_data (an sr.AudioData instance) with a DeepSpeech model kept in memory across speech files.
+    '''
+    import numpy
+    model, model_lock = get_model(model_filepath, scorer_filepath)
+    raw_data = audio_data.get_raw_data(convert_rate=model.sampleRate(), convert_width=2)
+    with model_lock:
+        transcript = model.stt(numpy.frombuffer(raw_data, dtype=numpy.int16))
+    return transcript, {}
@@ -0,0 +1,63 @@
+'''
+Google Speech Recognition plugin of the benchmark, see engines.py.
+'''
+
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Google Speech Recognition.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    speech_language = settings.get('general','speech_language')
+    try:
+        # for testing purposes, we're just using the default API key
+        # to use another API key, use `r.recognize_google(audio, key="GOOGLE_SPEECH_RECOGNITION_API_KEY")`
+        # instead of `r.recognize_google(audio)`
+        kwargs = {}
+        google_api_key = "" #settings.get('general','google_api_key')
+        if google_api_key != "" : kwargs['key'] = google_api_key
+        response = r.recognize_google(audio, show_all=True, language=speech_language, **kwargs)
+        transcription_json = response
+
+        actual_result = response
+        if not isinstance(actual_result, dict) or len(actual_result.get("alternative", [])) == 0: raise sr.UnknownValueError()
+
+        if "confidence" in actual_result["alternative"]:
+            # return alternative with highest confidence score
+            best_hypothesis = max(actual_result["alternative"], key=lambda alternative: alternative["confidence"])
+        else:
+            # when there is no confidence available, we arbitrarily choose the first hypothesis.
+            best_hypothesis = actual_result["alternative"][0]
+        if "transcript" not in best_hypothesis: raise sr.UnknownValueError()
+        transcription = best_hypothesis["transcript"]
+
+        utils.log("Google Speech Recognition transcription is: " + transcription)
+    except sr.UnknownValueError:
+        utils.log("Google Speech Recognition could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from Google Speech Recognition service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
+
+
+def get_alternatives(transcription_json):
+    '''
+    Returns the transcripts of the N-best alternatives of a Google Speech Recognition response.
+    '''
+    if not isinstance(transcription_json, dict): return []
+    return [alternative['transcript'] for alternative in transcription_json.get('alternative', []) if 'transcript' in alternative]
+
+
+def get_confidence(transcription_json):
+    '''
+    Returns the confidence of the transcription of a Google Speech Recognition response (its most confident alternative).
+    '''
+    if not isinstance(transcription_json, dict): return None
+    confidences = [alternative['confidence'] for alternative in transcription_json.get('alternative', []) if 'confidence' in alternative]
+    return max(confidences) if len(confidences) > 0 else None
@@ -0,0 +1,52 @@
+'''
+Google Cloud Speech plugin of the benchmark, see engines.py.
+'''
+
+import codecs
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Google Cloud Speech.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    speech_language = settings.get('general','speech_language')
+    GOOGLE_CLOUD_SPEECH_CREDENTIALS_filepath = settings.get('credentials','google_cloud_speech_credentials_filepath')
+    GOOGLE_CLOUD_SPEECH_CREDENTIALS = codecs.open(GOOGLE_CLOUD_SPEECH_CREDENTIALS_filepath, 'r', 'UTF-8').read()
+    try:
+        response = r.recognize_google_cloud(audio, credentials_json=GOOGLE_CLOUD_SPEECH_CREDENTIALS, show_all=True, language=speech_language)
+        transcription_json = response
+        if "results" not in response or len(response["results"]) == 0: raise sr.UnknownValueError()
+        transcript = ""
+        for result in response["results"]:
+            transcript += result["alternatives"][0]["transcript"].strip() + " "
+
+        transcription = transcript
+
+    except sr.UnknownValueError:
+        utils.log("Google Cloud Speech could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from Google Cloud Speech service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
+
+
+def get_alternatives(transcription_json):
+    '''
+    Returns the transcripts of the N-best alternatives of a Google Cloud Speech response.
+    '''
+    import engines
+    return engines.combine_segment_alternatives(transcription_json.get('results', []))
+
+
+def get_confidence(transcription_json):
+    '''
+    Returns the confidence of the transcription of a Google Cloud Speech response.
+    '''
+    import engines
+    return engines.average_segment_confidence(transcription_json.get('results', []))
@@ -0,0 +1,36 @@
+'''
+Houndify plugin of the benchmark, see engines.py.
+'''
+
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Houndify.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    HOUNDIFY_CLIENT_ID = settings.get('credentials','houndify_client_id')
+    HOUNDIFY_CLIENT_KEY = settings.get('credentials','houndify_client_key')
+
+    utils.log("Calling the Houndify API")
+    try:
+        response = r.recognize_houndify(audio, client_id=HOUNDIFY_CLIENT_ID, client_key=HOUNDIFY_CLIENT_KEY, show_all=True)
+        transcription_json = response
+
+        if "Disambiguation" not in response or response["Disambiguation"] is None:
+            raise sr.UnknownValueError()
+
+        transcription = response['Disambiguation']['ChoiceData'][0]['Transcription']
+
+
+    except sr.UnknownValueError:
+        utils.log("Houndify could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from Houndify service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
@@ -0,0 +1,57 @@
+'''
+IBM Speech to Text plugin of the benchmark, see engines.py.
+'''
+
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using IBM Speech to Text.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    speech_language = settings.get('general','speech_language')
+    IBM_USERNAME = settings.get('credentials','ibm_username')
+    IBM_PASSWORD = settings.get('credentials','ibm_password')
+    try:
+        response = r.recognize_ibm(audio, username=IBM_USERNAME, password=IBM_PASSWORD, show_all=True, language=speech_language)
+        transcription_json = response
+
+        if "results" not in response or len(response["results"]) < 1 or "alternatives" not in response["results"][0]:
+            raise sr.UnknownValueError()
+
+        transcription = []
+        for utterance in response["results"]:
+            if "alternatives" not in utterance: raise sr.UnknownValueError()
+            for hypothesis in utterance["alternatives"]:
+                if "transcript" in hypothesis:
+                    transcription.append(hypothesis["transcript"])
+        transcription = "\n".join(transcription)
+        transcription = transcription.strip()
+
+    except sr.UnknownValueError:
+        utils.log("IBM Speech to Text could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from IBM Speech to Text service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
+
+
+def get_alternatives(transcription_json):
+    '''
+    Returns the transcripts of the N-best alternatives of an IBM Speech to Text response.
+    '''
+    import engines
+    return engines.combine_segment_alternatives(transcription_json.get('results', []))
+
+
+def get_confidence(transcription_json):
+    '''
+    Returns the confidence of the transcription of an IBM Speech to Text response.
+    '''
+    import engines
+    return engines.average_segment_confidence(transcription_json.get('results', []))
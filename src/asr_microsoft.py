@@ -0,0 +1,32 @@
+'''
+Microsoft Bing Voice Recognition plugin of the benchmark, see engines.py.
+'''
+
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Microsoft Bing Voice Recognition.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    speech_language = settings.get('general','speech_language')
+    BING_KEY = settings.get('credentials','bing_key')
+    utils.log('Calling the Microsoft Bing Voice Recognition API')
+    try:
+        response =  r.recognize_bing(audio, key=BING_KEY, show_all=True, language=speech_language)
+        transcription_json = response
+        if "RecognitionStatus" not in response or response["RecognitionStatus"] != "Success" or "DisplayText" not in response:
+            raise sr.UnknownValueError()
+        transcription = response["DisplayText"]
+
+    except sr.UnknownValueError:
+        utils.log("Microsoft Bing Voice Recognition could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from Microsoft Bing Voice Recognition service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
@@ -6,10 +6,13 @@ Most of the code comes from https://github.com/speechmatics/speechmatics_python
 import codecs
 import json
 import logging
+import os
+import tempfile
 import time
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 import requests
 import pprint
+import utils
 
 
 class SpeechmaticsError(Exception):
@@ -165,7 +168,7 @@ def transcribe_speechmatics(speechmatics_id, speechmatics_token, speech_filepath
     """
     Example way to use the Speechmatics Client to process a job
     """
-    logging.basicConfig(level=logging.INFO)
+    logging.basicConfig(level=logging.WARNING if utils.quiet else logging.INFO)
 
     #opts = parse_args()
     client = SpeechmaticsClient(speechmatics_id, speechmatics_token)
@@ -201,15 +204,45 @@ def transcribe_speechmatics(speechmatics_id, speechmatics_token, speech_filepath
     #output_format = 'txt'
     output = client.get_output(job_id, format, job_type)
 
-    logging.info("Your job output:")
-    if job_type == 'transcript' and output_format:
-        print(json.dumps(output, indent=4))
-
     output_dictionary = json.loads(output)
-    pprint.pprint(output_dictionary)
+    if not utils.quiet:
+        logging.info("Your job output:")
+        if job_type == 'transcript' and output_format:
+            print(json.dumps(output, indent=4))
+        pprint.pprint(output_dictionary)
     predicted_transcription =''
     for word in output_dictionary['words']:
         predicted_transcription+= word['name'] + ' '
     predicted_transcription = predicted_transcription.strip()
     #print('predicted_transcription: {0}'.format(predicted_transcription))
     return predicted_transcription, output
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    """
+    Speechmatics plugin of the benchmark, see engines.py.
+    """
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    speech_language = settings.get('general','speech_language')
+    speechmatics_id = settings.get('credentials','speechmatics_id')
+    speechmatics_token = settings.get('credentials','speechmatics_token')
+    try:
+        if speech_filepath is None:
+            # Speechmatics requires a file to be uploaded, e.g. for the chunks of a segmented speech file
+            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temporary_file:
+                temporary_file.write(audio.get_wav_data())
+            try:
+                transcription, transcription_json = transcribe_speechmatics(speechmatics_id,speechmatics_token,temporary_file.name,speech_language)
+            finally:
+                os.remove(temporary_file.name)
+        else:
+            utils.log('speech_filepath: {0}'.format(speech_filepath))
+            transcription, transcription_json = transcribe_speechmatics(speechmatics_id,speechmatics_token,speech_filepath,speech_language)
+        utils.log('Speechmatics  transcription is: {0}'.format(transcription))
+    except (SpeechmaticsError, requests.exceptions.RequestException) as e:
+        utils.log('Could not request results from Speechmatics; {0}'.format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
@@ -0,0 +1,31 @@
+'''
+Wit.ai plugin of the benchmark, see engines.py.
+'''
+
+import speech_recognition as sr
+import utils
+
+
+def recognize(r, audio, settings, speech_filepath=None):
+    '''
+    Recognize speech using Wit.ai. speech_language is ignored by Wit.ai.
+    '''
+    transcription = ''
+    transcription_json = ''
+    asr_could_not_be_reached = False
+    WIT_AI_KEY = settings.get('credentials','wit_ai_key')
+    utils.log("Calling the Wit.ai API")
+    try:
+        response = r.recognize_wit(audio, key=WIT_AI_KEY, show_all=True)
+        transcription_json = response
+
+        if "_text" not in response or response["_text"] is None: raise sr.UnknownValueError()
+        transcription = response["_text"]
+
+    except sr.UnknownValueError:
+        utils.log("Wit.ai could not understand audio")
+    except sr.RequestError as e:
+        utils.log("Could not request results from Wit.ai service; {0}".format(e))
+        asr_could_not_be_reached = True
+
+    return transcription, transcription_json, asr_could_not_be_reached
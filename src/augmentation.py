@@ -0,0 +1,124 @@
+'''
+Robustness evaluation: degraded variants of the speech files (noise, gain, speed, telephone band, codec) are generated in memory
+from the PCM samples, right before they are sent to the ASR APIs, instead of being written to disk as new corpora.
+
+A variant is a name and a chain of operations, given in the setting `variants` of the section [augmentation], e.g.:
+    variants = clean, snr10=noise:10, slow=speed:0.9, telephone=resample:8000+bandpass:300:3400+mulaw:256
+Supported operations:
+ - noise:<snr_db>                 additive white Gaussian noise at a signal-to-noise ratio of snr_db dB
+ - gain:<gain_db>                 amplify (or attenuate if negative) by gain_db dB, with clipping
+ - speed:<factor>                 play factor times faster (tempo and pitch change, like `sox speed`)
+ - resample:<sample_rate>         resample to sample_rate Hz and back (e.g. 8000 to simulate a narrowband recording)
+ - bandpass:<low_hz>:<high_hz>    keep only the frequencies between low_hz and high_hz
+ - mulaw:<quantization_levels>    mu-law companding and quantization, as in G.711 telephone codecs
+The variant `clean` is the original audio.
+
+numpy and speech_recognition are only imported when a variant is generated, not to parse the variants.
+
+The random operations are seeded with the setting `seed`, the variant name and the speech file name, so that a run is reproducible.
+'''
+
+import inspect
+import zlib
+
+CLEAN_VARIANT = 'clean'
+
+
+def get_variants(settings):
+    '''
+    Returns the list of the (variant_name, operations) configured in settings, where operations is a list of
+    (operation_name, arguments). The clean variant has no operation.
+    '''
+    variants = []
+    for variant in settings.get('augmentation','variants').split(','):
+        variant = variant.strip()
+        if variant == '': continue
+        if '=' not in variant:
+            if variant != CLEAN_VARIANT:
+                raise ValueError('Invalid variant "{0}": variants should be clean or of the form name=operation:argument+operation:argument'.format(variant))
+            variants.append((CLEAN_VARIANT, []))
+            continue
+        variant_name, operations = variant.split('=', 1)
+        parsed_operations = []
+        for operation in operations.split('+'):
+            operation_name = operation.split(':')[0].strip()
+            if operation_name not in OPERATIONS:
+                raise ValueError('Invalid operation "{0}" in variant "{1}". Supported operations are {2}.'.format(operation_name, variant_name, sorted(OPERATIONS)))
+            try:
+                arguments = [float(argument) for argument in operation.split(':')[1:]]
+                inspect.signature(OPERATIONS[operation_name]).bind(None, None, None, *arguments)
+            except (ValueError, TypeError):
+                raise ValueError('Invalid arguments for the operation "{0}" in variant "{1}": {2}'.format(operation_name, variant_name, operation.strip()))
+            parsed_operations.append((operation_name, arguments))
+        variants.append((variant_name.strip(), parsed_operations))
+    return variants
+
+
+def get_seed(seed, variant_name, speech_filepath):
+    '''
+    Seed of the random operations of variant_name for speech_filepath, stable across runs and platforms.
+    '''
+    return [seed, zlib.crc32(variant_name.encode('utf-8')), zlib.crc32(speech_filepath.replace('\\', '/').split('/')[-1].encode('utf-8'))]
+
+
+def add_noise(samples, sample_rate, random_generator, snr_db):
+    import numpy
+    signal_power = numpy.mean(samples ** 2) if len(samples) > 0 else 0
+    noise_power = signal_power / 10 ** (snr_db / 10)
+    return samples + random_generator.normal(0, numpy.sqrt(noise_power), len(samples))
+
+
+def apply_gain(samples, sample_rate, random_generator, gain_db):
+    return samples * 10 ** (gain_db / 20)
+
+
+def change_speed(samples, sample_rate, random_generator, factor):
+    import numpy
+    number_of_output_samples = int(len(samples) / factor)
+    return numpy.interp(numpy.arange(number_of_output_samples) * factor, numpy.arange(len(samples)), samples)
+
+
+def band_pass(samples, sample_rate, random_generator, low_hz, high_hz):
+    import numpy
+    spectrum = numpy.fft.rfft(samples)
+    frequencies = numpy.fft.rfftfreq(len(samples), 1 / sample_rate)
+    spectrum[(frequencies < low_hz) | (frequencies > high_hz)] = 0
+    return numpy.fft.irfft(spectrum, len(samples))
+
+
+def resample(samples, sample_rate, random_generator, new_sample_rate):
+    import numpy
+    if new_sample_rate >= sample_rate: return samples
+    # Anti-aliasing filter, then down- and up-sampling by linear interpolation
+    samples = band_pass(samples, sample_rate, random_generator, 0, new_sample_rate / 2)
+    times = numpy.arange(len(samples)) / sample_rate
+    new_times = numpy.arange(int(len(samples) * new_sample_rate / sample_rate)) / new_sample_rate
+    return numpy.interp(times, new_times, numpy.interp(new_times, times, samples))
+
+
+def mu_law(samples, sample_rate, random_generator, quantization_levels=256):
+    import numpy
+    mu = quantization_levels - 1
+    samples = numpy.clip(samples, -1, 1)
+    encoded = numpy.sign(samples) * numpy.log1p(mu * numpy.abs(samples)) / numpy.log1p(mu)
+    encoded = numpy.round((encoded + 1) / 2 * mu) / mu * 2 - 1
+    return numpy.sign(encoded) * ((1 + mu) ** numpy.abs(encoded) - 1) / mu
+
+
+OPERATIONS = {'noise': add_noise, 'gain': apply_gain, 'speed': change_speed, 'resample': resample, 'bandpass': band_pass, 'mulaw': mu_law}
+
+
+def augment(audio_data, operations, seed=None):
+    '''
+    Returns a new sr.AudioData instance (16-bit, same sample rate as audio_data) with the operations applied
+    to the samples of audio_data (an sr.AudioData instance). See get_variants() for operations.
+    '''
+    if len(operations) == 0: return audio_data
+    import numpy
+    import speech_recognition as sr
+    random_generator = numpy.random.default_rng(seed)
+    samples = numpy.frombuffer(audio_data.get_raw_data(convert_width=2), dtype=numpy.int16) / 32768
+    for operation_name, arguments in operations:
+        samples = OPERATIONS[operation_name](samples, audio_data.sample_rate, random_generator, *arguments)
+    samples = numpy.clip(numpy.round(samples * 32768), -32768, 32767).astype(numpy.int16)
+    return sr.AudioData(samples.tobytes(), audio_data.sample_rate, 2)
@@ -8,12 +8,14 @@ import configparser
 import glob
 import os
 import transcribe
-import metrics
+import telemetry
+import utils
 import time
 import collections
 import shutil
-import codecs
-import pandas as pd
+import queue
+import threading
+import traceback
 
 def main():
 
@@ -25,42 +27,43 @@ def main():
     exp_name = settings.get('general','exp_name')
     asr_systems = settings.get('general','asr_systems').split(',')
     data_folders = settings.get('general','data_folders').split(',')
-    supported_speech_file_types = sorted(['flac', 'mp3', 'ogg', 'wav'])
 
     print('asr_systems: {0}'.format(asr_systems))
     print('data_folders: {0}'.format(data_folders))
 
+    utils.quiet = settings.getboolean('general','quiet')
+    stop_telemetry_exporters = telemetry.start_exporters(settings)
+
+    # Variants of the speech files sent to the ASR engines (see augmentation.py). By default, only the original audio (clean).
+    variants = [('clean', [])]
+    if settings.get('augmentation','variants').strip() != 'clean':
+        import augmentation
+        variants = augmentation.get_variants(settings)
+    if settings.getboolean('adaptive_sampling','enabled') and len(variants) > 1:
+        print('Adaptive sampling only transcribes and evaluates the clean variant: the other variants are ignored.')
+        variants = [('clean', [])]
+    variant_names = [variant_name for variant_name, operations in variants]
+    print('variants: {0}'.format(variant_names))
+
+    sampled_speech_filepaths = None
+    if settings.getboolean('adaptive_sampling','enabled') and settings.getboolean('general','transcribe'):
+        # Transcribe a random, stratified sample of the speech files, until the WER of each ASR engine is precise enough
+        sampled_speech_filepaths = transcribe_adaptive_sample(data_folders, asr_systems, settings, settings_filepath, exp_name)
+
     for data_folder in data_folders:
         print('\nWorking on data folder "{0}"'.format(data_folder))
-        speech_file_type = settings.get('general','speech_file_type')
-
-        # Automatically detect the speech file type.
-        # Heuristic: the detected speech file type is the one that has the more speech files in data_folder
-        #            e.g., if in data_folder there are 10 mp3s and 25 flacs, then choose flac
-        if speech_file_type == 'auto':
-            maximum_number_of_speech_files = 0
-            detected_speech_file_type = None
-            for supported_speech_file_type in supported_speech_file_types:
-                potential_speech_filepaths = sorted(glob.glob(os.path.join(data_folder, '*.{0}'.format(supported_speech_file_type))))
-                if maximum_number_of_speech_files < len(potential_speech_filepaths):
-                    maximum_number_of_speech_files = len(potential_speech_filepaths)
-                    detected_speech_file_type = supported_speech_file_type
-            speech_file_type = detected_speech_file_type
-            print('Detected speech file type: {0}'.format(speech_file_type))
-            if detected_speech_file_type is None:
-                raise ValueError('You have set speech_file_type to be "auto" in {1}. We couldn\'t detect any speech file. Speech file extensions should be {2}.'
-                                 .format(speech_file_type, settings_filepath, supported_speech_file_types))
-
-        if speech_file_type not in supported_speech_file_types:
-            raise ValueError('You have set speech_file_type to be "{0}" in {1}. This is invalid. speech_file_type should be flac, ogg, mp3, or wav.'.
-                             format(speech_file_type, settings_filepath))
-
-        speech_filepaths = sorted(glob.glob(os.path.join(data_folder, '*.{0}'.format(speech_file_type))))
-
-        if settings.getint('general','max_data_files') > 0:
-            speech_filepaths = speech_filepaths[0:settings.getint('general','max_data_files')]
-
-        if settings.getboolean('general','transcribe'):
+        speech_file_type, speech_filepaths = get_speech_filepaths(data_folder, settings, settings_filepath)
+
+        # In the fused mode, each speech file is scored as soon as it is transcribed, instead of after all the speech files are transcribed
+        fused_evaluation = settings.getboolean('general','fused_evaluation') and settings.getboolean('general','transcribe') and \
+            settings.getboolean('general','evaluate_transcriptions') and not settings.getboolean('adaptive_sampling','enabled')
+        if fused_evaluation:
+            import evaluation
+            corpus_evaluation = evaluation.Evaluation(asr_systems, variant_names, settings)
+            score_transcriptions, stop_scoring = start_scoring_consumer(corpus_evaluation, exp_name+'_summary.csv',
+                                                                 settings.getfloat('general','summary_flush_interval_in_seconds'))
+
+        if settings.getboolean('general','transcribe') and not settings.getboolean('adaptive_sampling','enabled'):
 
             # Make sure there are files to transcribe
             if len(speech_filepaths) <= 0:
@@ -69,104 +72,231 @@ def main():
 
             # Transcribe
             print('\n### Call the ASR engines to compute predicted transcriptions')
+            telemetry.default_telemetry.add_planned_transcriptions(len(speech_filepaths) * len(asr_systems) * len(variant_names))
             for speech_file_number, speech_filepath in enumerate(speech_filepaths):
-                # Convert the speech file from FLAC/MP3/Ogg to WAV
-                if speech_file_type in ['flac', 'mp3', 'ogg']:
-                    from pydub import AudioSegment
-                    print('speech_filepath: {0}'.format(speech_filepath))
-                    sound = AudioSegment.from_file(speech_filepath, format=speech_file_type)
-                    new_speech_filepath = speech_filepath[:-len(speech_file_type)-1]+'.wav'
-                    sound.export(new_speech_filepath, format="wav")
-                    speech_filepath = new_speech_filepath
-
-
-                # Transcribe the speech file
-                all_transcription_skipped = True
-                for asr_system in asr_systems:
-                    transcription, transcription_skipped = transcribe.transcribe(speech_filepath,asr_system,settings,save_transcription=True)
-                    all_transcription_skipped = all_transcription_skipped and transcription_skipped
-
-                # If the speech file was converted from FLAC/MP3/Ogg to WAV, remove the WAV file
-                if speech_file_type in ['flac', 'mp3', 'ogg']:
-                    os.remove(new_speech_filepath)
+                transcriptions, all_transcription_skipped = transcribe_speech_file(speech_filepath, speech_file_type, asr_systems, settings, variants)
+                if fused_evaluation:
+                    score_transcriptions(speech_filepath, transcriptions)
 
                 if not all_transcription_skipped:
                     time.sleep(settings.getint('general','delay_in_seconds_between_transcriptions'))
 
+            if settings.getboolean('pcm_cache','enabled'):
+                transcribe.get_pcm_cache(settings).save_index()
+
         if settings.getboolean('general','evaluate_transcriptions'):
             # Evaluate transcriptions
-            df = pd.DataFrame(columns =['file', 'gold', 'len', 'service', 'transcript', 'wer', 'changes', 'corrects', 'subs', 'ins', 'dels'])
-            df = df.astype(dtype= {'len': 'int', 'wer': 'float', 'changes': 'int', 'corrects': 'int', 'subs': 'int', 'ins': 'int', 'dels': 'int'})
-            all_texts = {}
+            # Only needed for the evaluation
+            import evaluation
+            if fused_evaluation:
+                # All the speech files are already scored
+                stop_scoring()
+            else:
+                corpus_evaluation = evaluation.Evaluation(asr_systems, variant_names, settings, sampled_speech_filepaths)
+                for speech_filepath in speech_filepaths:
+                    corpus_evaluation.add_speech_file(speech_filepath)
+            corpus_evaluation.close()
             print('\n### Final evaluation of all the ASR engines based on their predicted jurisdictions')
+            corpus_evaluation.print_summary(corpus_evaluation.number_of_speech_files)
+            corpus_evaluation.write_summary(exp_name+'_summary.csv')
 
-            for asr_system in asr_systems:
-                all_texts[asr_system] = {}
-
-                all_predicted_transcription_filepath = 'all_predicted_transcriptions_' + asr_system + '.txt'
-                all_gold_transcription_filepath = 'all_gold_transcriptions.txt'
-                all_predicted_transcription_file = codecs.open(all_predicted_transcription_filepath, 'w', settings.get('general','predicted_transcription_encoding'))
-                all_gold_transcription_filepath = codecs.open(all_gold_transcription_filepath, 'w', settings.get('general','gold_transcription_encoding'))
+    stop_telemetry_exporters()
 
-                number_of_tokens_in_gold = 0
-                number_of_empty_predicted_transcription_txt_files = 0
-                number_of_missing_predicted_transcription_txt_files = 0
-                edit_types = ['corrects', 'deletions', 'insertions', 'substitutions', 'changes']
-                number_of_edits = {}
-                
-                for edit_type in edit_types:
-                    number_of_edits[edit_type] = 0
 
-                for speech_filepath in speech_filepaths:
-                    predicted_transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + asr_system
-                    predicted_transcription_txt_filepath = predicted_transcription_filepath_base  + '.txt'
-
-                    if not os.path.isfile(predicted_transcription_txt_filepath):
-                        number_of_missing_predicted_transcription_txt_files += 1
-                        predicted_transcription = ''
-                    else:
-                        predicted_transcription = codecs.open(predicted_transcription_txt_filepath, 'r', settings.get('general','predicted_transcription_encoding')).read().strip()
-                        if len(predicted_transcription) == 0:
-                            #print('predicted_transcription_txt_filepath {0} is empty'.format(predicted_transcription_txt_filepath))
-                            number_of_empty_predicted_transcription_txt_files += 1
-
-                    gold_transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + 'gold'
-                    gold_transcription_filepath_text = gold_transcription_filepath_base  + '.txt'
-                    gold_transcription = codecs.open(gold_transcription_filepath_text, 'r', settings.get('general','gold_transcription_encoding')).read()
-                    gold_transcription = metrics.normalize_text(gold_transcription, lower_case=True, remove_punctuation=True,write_numbers_in_letters=True)
-                    predicted_transcription = metrics.normalize_text(predicted_transcription, lower_case=True, remove_punctuation=True,write_numbers_in_letters=True)
-
-                    all_predicted_transcription_file.write('{0}\n'.format(predicted_transcription))
-                    all_gold_transcription_filepath.write('{0}\n'.format(gold_transcription))
-                    #print('\npredicted_transcription\t: {0}'.format(predicted_transcription))
-                    #print('gold_transcription\t: {0}'.format(gold_transcription))
-                    wer = metrics.wer(gold_transcription.split(' '), predicted_transcription.split(' '))
-                    #print('wer: {0}'.format(wer))
-
-                    #if len(predicted_transcription) == 0: continue
-
-                    number_of_tokens_in_gold_this_sentence = len(gold_transcription.split(' '))
-                    number_of_tokens_in_gold += number_of_tokens_in_gold_this_sentence
-                    for edit_type in edit_types:
-                        number_of_edits[edit_type] += wer[edit_type]
-                    stats = {
-                        'file': speech_filepath, 'gold': gold_transcription, 'len': number_of_tokens_in_gold_this_sentence, 'service': asr_system, 'transcript': predicted_transcription, 
-                        'wer': wer['changes']/number_of_tokens_in_gold_this_sentence, 'changes': wer['changes'], 'corrects': wer['corrects'], 'subs': wer['substitutions'], 'ins': wer['insertions'], 'dels': wer['deletions']
-                    }
-                    df = df.append(stats, ignore_index=True)
-
-                all_predicted_transcription_file.close()
-                all_gold_transcription_filepath.close()
-
-                wer = number_of_edits['changes'] / number_of_tokens_in_gold
-                #print('\nGlobal WER based on the all predicted transcriptions:')
-                #print('{3}\twer: {0:.5f}% ({1}; number_of_tokens_in_gold = {2})'.format(wer*100, number_of_edits, number_of_tokens_in_gold,asr_system))
-                print('{5}\twer: {0:.5f}% \t(deletions: {1}\t; insertions: {2}\t; substitutions: {3}\t; number_of_tokens_in_gold = {4})'.
-                      format(wer*100, number_of_edits['deletions'], number_of_edits['insertions'], number_of_edits['substitutions'], number_of_tokens_in_gold,asr_system))
-                print('Number of speech files: {0}'.format(len(speech_filepaths)))
-                print('Number of missing predicted prescription files: {0}'.format(number_of_missing_predicted_transcription_txt_files))
-                print('Number of empty predicted prescription files: {0}'.format(number_of_empty_predicted_transcription_txt_files))
-            df.to_csv(exp_name+'_summary.csv')
+def get_speech_filepaths(data_folder, settings, settings_filepath='settings.ini'):
+    '''
+    Returns the speech file type of data_folder (detected if speech_file_type is auto) and the list of its speech files.
+    '''
+    supported_speech_file_types = sorted(['flac', 'mp3', 'ogg', 'wav'])
+    speech_file_type = settings.get('general','speech_file_type')
+
+    # Automatically detect the speech file type.
+    # Heuristic: the detected speech file type is the one that has the more speech files in data_folder
+    #            e.g., if in data_folder there are 10 mp3s and 25 flacs, then choose flac
+    if speech_file_type == 'auto':
+        maximum_number_of_speech_files = 0
+        detected_speech_file_type = None
+        for supported_speech_file_type in supported_speech_file_types:
+            potential_speech_filepaths = sorted(glob.glob(os.path.join(data_folder, '*.{0}'.format(supported_speech_file_type))))
+            if maximum_number_of_speech_files < len(potential_speech_filepaths):
+                maximum_number_of_speech_files = len(potential_speech_filepaths)
+                detected_speech_file_type = supported_speech_file_type
+        speech_file_type = detected_speech_file_type
+        print('Detected speech file type: {0}'.format(speech_file_type))
+        if detected_speech_file_type is None:
+            raise ValueError('You have set speech_file_type to be "auto" in {1}. We couldn\'t detect any speech file. Speech file extensions should be {2}.'
+                             .format(speech_file_type, settings_filepath, supported_speech_file_types))
+
+    if speech_file_type not in supported_speech_file_types:
+        raise ValueError('You have set speech_file_type to be "{0}" in {1}. This is invalid. speech_file_type should be flac, ogg, mp3, or wav.'.
+                         format(speech_file_type, settings_filepath))
+
+    speech_filepaths = sorted(glob.glob(os.path.join(data_folder, '*.{0}'.format(speech_file_type))))
+
+    if settings.getint('general','max_data_files') > 0:
+        speech_filepaths = speech_filepaths[0:settings.getint('general','max_data_files')]
+    return speech_file_type, speech_filepaths
+
+
+def transcribe_speech_file(speech_filepath, speech_file_type, asr_systems, settings, variants=(('clean', []),)):
+    '''
+    Transcribe each variant of variants (list of (variant_name, operations), see augmentation.get_variants()) of speech_filepath
+    with each ASR engine of asr_systems, and save the transcriptions.
+
+    Returns:
+     - transcriptions: dictionary mapping each (ASR engine, variant) pair to its transcription.
+     - all_transcription_skipped: Boolean indicating if the speech file was sent to none of the ASR APIs.
+    '''
+    # The existing transcriptions are checked first, so that the speech file is only decoded if some ASR engine needs it
+    transcriptions = {}
+    systems_to_transcribe = []
+    for variant_name, operations in variants:
+        for asr_system in asr_systems:
+            existing_transcription = transcribe.get_existing_transcription(speech_filepath, asr_system, settings, variant_name)
+            if existing_transcription is None:
+                systems_to_transcribe.append((asr_system, variant_name))
+            else:
+                telemetry.default_telemetry.record_transcription(asr_system, 'skipped')
+                transcriptions[(asr_system, variant_name)] = existing_transcription
+    if len(systems_to_transcribe) == 0:
+        return transcriptions, True
+
+    # With several variants, the speech file is decoded once in memory, and the variants are generated from the decoded audio
+    audio = None
+    if any(variant_name != 'clean' for asr_system, variant_name in systems_to_transcribe):
+        audio = transcribe.load_audio(speech_filepath, settings)
+    # With the PCM cache, speech files are decoded in memory by transcribe.load_audio(), and only once across runs
+    convert_to_wav = speech_file_type in ['flac', 'mp3', 'ogg'] and not settings.getboolean('pcm_cache','enabled') and audio is None
+    # Convert the speech file from FLAC/MP3/Ogg to WAV
+    if convert_to_wav:
+        from pydub import AudioSegment
+        utils.log('speech_filepath: {0}'.format(speech_filepath))
+        sound = AudioSegment.from_file(speech_filepath, format=speech_file_type)
+        new_speech_filepath = speech_filepath[:-len(speech_file_type)-1]+'.wav'
+        sound.export(new_speech_filepath, format="wav")
+        speech_filepath = new_speech_filepath
+
+    # Transcribe the speech file. Each variant is generated once, and sent to all the ASR engines
+    all_transcription_skipped = True
+    variant_audio_name = 'clean'
+    variant_audio = audio
+    for asr_system, variant_name in systems_to_transcribe:
+        if variant_name != variant_audio_name:
+            import augmentation
+            variant_audio_name = variant_name
+            variant_audio = augmentation.augment(audio, dict(variants)[variant_name],
+                                                 augmentation.get_seed(settings.getint('augmentation','seed'), variant_name, speech_filepath))
+        transcription, transcription_skipped = transcribe.transcribe(speech_filepath,asr_system,settings,save_transcription=True,
+                                                                     audio=variant_audio, variant=variant_name, variant_operations=[])
+        transcriptions[(asr_system, variant_name)] = transcription
+        all_transcription_skipped = all_transcription_skipped and transcription_skipped
+
+    # If the speech file was converted from FLAC/MP3/Ogg to WAV, remove the WAV file
+    if convert_to_wav:
+        os.remove(new_speech_filepath)
+    return transcriptions, all_transcription_skipped
+
+
+def transcribe_adaptive_sample(data_folders, asr_systems, settings, settings_filepath, exp_name):
+    '''
+    Transcribe the speech files of data_folders in a random order stratified by data folder, and stop sending speech files
+    to an ASR engine once the confidence interval of its WER is narrower than target_confidence_interval_width,
+    or doesn't overlap with the confidence intervals of the other ASR engines.
+    The WER estimates are saved in <exp_name>_adaptive_sampling_summary.csv.
+
+    Returns a dictionary mapping each (ASR engine, variant) pair to the set of the speech files it transcribed.
+    '''
+    import adaptive_sampling
+    import evaluation
+    import metrics
+    import pandas as pd
+    long_form_alignment_threshold = settings.getint('general','long_form_alignment_threshold')
+    strata = {}
+    for data_folder in data_folders:
+        speech_file_type, speech_filepaths = get_speech_filepaths(data_folder, settings, settings_filepath)
+        strata[data_folder] = [(speech_filepath, speech_file_type) for speech_filepath in speech_filepaths]
+    speech_files = adaptive_sampling.stratified_order(strata, seed=settings.getint('adaptive_sampling','seed'))
+    sampler = adaptive_sampling.AdaptiveSampler(asr_systems, settings.getfloat('adaptive_sampling','target_confidence_interval_width'),
+                                                settings.getint('adaptive_sampling','min_number_of_files'),
+                                                confidence=settings.getfloat('adaptive_sampling','confidence'))
+
+    sampled_speech_filepaths = collections.defaultdict(set)
+    print('\n### Call the ASR engines on a random sample of the speech files')
+    telemetry.default_telemetry.add_planned_transcriptions(len(speech_files) * len(asr_systems))
+    for speech_filepath, speech_file_type in speech_files:
+        active_asr_systems = sampler.get_active_asr_systems()
+        if len(active_asr_systems) == 0: break
+        transcriptions, all_transcription_skipped = transcribe_speech_file(speech_filepath, speech_file_type, active_asr_systems, settings)
+        gold_transcription = evaluation.read_gold_transcription(speech_filepath, settings)
+        for (asr_system, variant_name), transcription in transcriptions.items():
+            sampled_speech_filepaths[(asr_system, variant_name)].add(speech_filepath)
+            predicted_transcription = metrics.normalize_text(transcription.strip(), lower_case=True, remove_punctuation=True,write_numbers_in_letters=True)
+            scores = metrics.compute_metrics(gold_transcription, predicted_transcription, ['wer'], long_form_alignment_threshold)
+            sampler.update(asr_system, scores['changes'], scores['tokens_in_gold'])
+            if asr_system not in sampler.get_active_asr_systems():
+                print('{0}: stopped after {1} speech files ({2})'.format(asr_system, sampler.estimates[asr_system].number_of_files, sampler.stopping_reasons[asr_system]))
+
+        if not all_transcription_skipped:
+            time.sleep(settings.getint('general','delay_in_seconds_between_transcriptions'))
+
+    if settings.getboolean('pcm_cache','enabled'):
+        transcribe.get_pcm_cache(settings).save_index()
+
+    summary = sampler.get_summary()
+    for asr_system_summary in summary:
+        print('{0}\twer: {1:.5f}% \t({2:.0%} confidence interval: [{3:.5f}%, {4:.5f}%]\t; number of speech files: {5}\t; {6})'.
+              format(asr_system_summary['service'], asr_system_summary['wer']*100, settings.getfloat('adaptive_sampling','confidence'),
+                     asr_system_summary['wer_lower_bound']*100, asr_system_summary['wer_upper_bound']*100,
+                     asr_system_summary['files'], asr_system_summary['stopping_reason']))
+    pd.DataFrame(summary).to_csv(exp_name+'_adaptive_sampling_summary.csv')
+    return sampled_speech_filepaths
+
+
+def start_scoring_consumer(corpus_evaluation, summary_filepath, flush_interval_in_seconds):
+    '''
+    Start a thread that scores the transcriptions of each speech file as soon as they are done, and writes the summary
+    to summary_filepath every flush_interval_in_seconds seconds.
+
+    Returns two functions:
+     - score(speech_filepath, transcriptions): queue the transcriptions of speech_filepath (see transcribe_speech_file()).
+       If the scoring of a previous speech file failed, raises its exception instead, so that the run stops right away
+       instead of transcribing speech files that will never be scored.
+     - stop(): wait until all the queued transcriptions are scored.
+    '''
+    scoring_queue = queue.Queue()
+    errors = []
+
+    def score_transcriptions():
+        last_flush = time.time()
+        while True:
+            item = scoring_queue.get()
+            if item is None: return
+            try:
+                corpus_evaluation.add_speech_file(*item)
+                if time.time() - last_flush >= flush_interval_in_seconds:
+                    corpus_evaluation.write_summary(summary_filepath)
+                    corpus_evaluation.print_running_totals()
+                    last_flush = time.time()
+            except Exception as e:
+                print('The scoring of the speech file {0} failed:'.format(item[0]))
+                traceback.print_exc()
+                errors.append(e)
+                return
+
+    scoring_thread = threading.Thread(target=score_transcriptions, daemon=True)
+    scoring_thread.start()
+
+    def score(speech_filepath, transcriptions):
+        if len(errors) > 0:
+            raise errors[0]
+        scoring_queue.put((speech_filepath, transcriptions))
+
+    def stop():
+        scoring_queue.put(None)
+        scoring_thread.join()
+        if len(errors) > 0:
+            raise errors[0]
+    return score, stop
 
 
 if __name__ == "__main__":
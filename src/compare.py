@@ -0,0 +1,102 @@
+'''
+Interactive comparison of the ASR engines on a single speech file: the speech file is decoded once, sent to all the
+ASR engines at the same time, and each transcription is printed as soon as it arrives, with its latency and,
+if a reference transcription is available, its WER. The transcriptions are not saved.
+
+Usage: cd src; python compare.py hello.wav [--reference "hello world"] [--asr_systems google,ibm] [--timeout 30]
+By default, the ASR engines are the asr_systems of settings.ini, and the reference is read from hello_gold.txt if it exists.
+'''
+
+import argparse
+import codecs
+import configparser
+import os
+import queue
+import threading
+import time
+
+import metrics
+import transcribe
+import utils
+
+
+def compare(speech_filepath, asr_systems, settings, reference=None, timeout_in_seconds=60):
+    '''
+    Send speech_filepath to all asr_systems in parallel, and print the results as they arrive.
+    Returns as soon as all the ASR engines have responded, or timeout_in_seconds seconds after the requests were sent:
+    the ASR engines that haven't responded yet are reported as timed out, and not waited for.
+
+    Returns a dictionary mapping each ASR engine to its result (transcription, latency, wer or error).
+    '''
+    import speech_recognition as sr
+    if reference is not None:
+        reference = metrics.normalize_text(reference, lower_case=True, remove_punctuation=True, write_numbers_in_letters=True)
+    audio = transcribe.load_audio(speech_filepath, settings)
+    print('speech_filepath: {0} ({1:.1f} seconds)'.format(speech_filepath, len(audio.frame_data) / (audio.sample_rate * audio.sample_width)))
+
+    results_queue = queue.Queue()
+
+    def send(asr_system):
+        timestamp_started = time.time()
+        result = {}
+        try:
+            transcription, transcription_json, asr_could_not_be_reached, chunk_results = transcribe.send_to_asr(sr.Recognizer(), audio, speech_filepath,
+                                                                                                                asr_system, settings)
+            result['transcription'] = transcription.strip()
+            if asr_could_not_be_reached:
+                result['error'] = 'the ASR API could not be reached'
+        except Exception as e:
+            result['error'] = str(e)
+        result['latency'] = time.time() - timestamp_started
+        results_queue.put((asr_system, result))
+
+    # Daemon threads, so that the ASR engines that time out don't keep the program running
+    for asr_system in asr_systems:
+        threading.Thread(target=send, args=(asr_system,), daemon=True).start()
+
+    deadline = time.time() + timeout_in_seconds
+    results = {}
+    while len(results) < len(asr_systems):
+        try:
+            asr_system, result = results_queue.get(timeout=max(deadline - time.time(), 0))
+        except queue.Empty:
+            break
+        if 'transcription' in result and reference is not None:
+            predicted_transcription = metrics.normalize_text(result['transcription'], lower_case=True, remove_punctuation=True, write_numbers_in_letters=True)
+            result['wer'] = metrics.compute_metrics(reference, predicted_transcription, ['wer'])['wer']
+        results[asr_system] = result
+        print('{0}\t{1:.3f} s\t{2}\t{3}'.format(asr_system, result['latency'],
+                                                'wer: {0:.2f}%'.format(result['wer']*100) if 'wer' in result else '',
+                                                result.get('transcription', '') if 'error' not in result else 'error: {0}'.format(result['error'])))
+    for asr_system in asr_systems:
+        if asr_system not in results:
+            results[asr_system] = {'error': 'timed out after {0} seconds'.format(timeout_in_seconds)}
+            print('{0}\ttimed out after {1} seconds'.format(asr_system, timeout_in_seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send one speech file to all the ASR engines at the same time, and compare their transcriptions.')
+    parser.add_argument('speech_filepath', help='speech file to transcribe')
+    parser.add_argument('--reference', help='reference transcription (default: content of the gold transcription file of the speech file, if any)')
+    parser.add_argument('--asr_systems', help='comma-separated ASR engines (default: asr_systems of the settings file)')
+    parser.add_argument('--timeout', type=float, default=60, help='maximum time in seconds to wait for each ASR engine')
+    parser.add_argument('--settings', default='settings.ini', help='settings file')
+    parser.add_argument('--verbose', action='store_true', help='print the messages of the ASR engines')
+    args = parser.parse_args()
+
+    # Load setting file
+    settings = configparser.ConfigParser()
+    settings.read(args.settings)
+    utils.quiet = not args.verbose
+
+    asr_systems = args.asr_systems.split(',') if args.asr_systems else settings.get('general','asr_systems').split(',')
+    reference = args.reference
+    gold_transcription_filepath = '.'.join(args.speech_filepath.split('.')[:-1]) + '_gold.txt'
+    if reference is None and os.path.isfile(gold_transcription_filepath):
+        reference = codecs.open(gold_transcription_filepath, 'r', settings.get('general','gold_transcription_encoding')).read()
+    compare(args.speech_filepath, asr_systems, settings, reference, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+'''
+Registry of the ASR engines supported by the benchmark.
+
+Each engine is a plugin module that is only imported when the engine is used, so that the benchmark doesn't pay
+for the imports (speech_recognition, requests, boto3, etc.) of the engines that are not configured in asr_systems.
+
+A plugin module defines:
+ - recognize(r, audio, settings, speech_filepath=None): sends audio (an sr.AudioData instance) to the ASR API, using
+   the sr.Recognizer instance r, and returns transcription, transcription_json, asr_could_not_be_reached.
+   speech_filepath is only used by the ASR APIs that require a file to be uploaded.
+ - optionally, get_alternatives(transcription_json): returns the N-best alternative transcriptions found in the raw
+   response of the ASR API, used to compute the oracle WER.
+ - optionally, get_confidence(transcription_json): returns the confidence (between 0 and 1) of the transcription found in the
+   raw response of the ASR API, or None, used to combine the ASR engines (see rover.py).
+'''
+
+import importlib
+
+ENGINE_MODULES = {
+    'amazon': 'asr_amazon',
+    'deepspeech': 'asr_deepspeech',
+    'google': 'asr_google',
+    'googlecloud': 'asr_googlecloud',
+    'houndify': 'asr_houndify',
+    'ibm': 'asr_ibm',
+    'microsoft': 'asr_microsoft',
+    'speechmatics': 'asr_speechmatics',
+    'wit': 'asr_wit',
+}
+
+
+def get_engine(asr_system):
+    '''
+    Returns the plugin module of asr_system, importing it on first use.
+    '''
+    if asr_system not in ENGINE_MODULES:
+        raise ValueError("Invalid asr_system. asr_system = {0}".format(asr_system))
+    return importlib.import_module(ENGINE_MODULES[asr_system])
+
+
+def get_alternatives(asr_system, transcription_json):
+    '''
+    Returns the N-best alternative transcriptions of the raw response transcription_json of asr_system,
+    or an empty list if the ASR engine doesn't return alternatives.
+    '''
+    engine = get_engine(asr_system)
+    if not hasattr(engine, 'get_alternatives') or not transcription_json: return []
+    return engine.get_alternatives(transcription_json)
+
+
+def get_confidence(asr_system, transcription_json):
+    '''
+    Returns the confidence of the transcription in the raw response transcription_json of asr_system,
+    or None if the ASR engine doesn't return confidences.
+    '''
+    engine = get_engine(asr_system)
+    if not hasattr(engine, 'get_confidence') or not transcription_json: return None
+    return engine.get_confidence(transcription_json)
+
+
+def average_segment_confidence(results):
+    '''
+    For the responses made of several consecutive segments (see combine_segment_alternatives()), the average confidence
+    of the best alternative of each segment, weighted by its number of words, or None if there is no confidence.
+    '''
+    total_confidence = 0
+    number_of_words = 0
+    for result in results:
+        alternatives = result.get('alternatives', [])
+        if len(alternatives) == 0 or 'confidence' not in alternatives[0]: continue
+        segment_number_of_words = max(len(alternatives[0].get('transcript', '').split()), 1)
+        total_confidence += alternatives[0]['confidence'] * segment_number_of_words
+        number_of_words += segment_number_of_words
+    return total_confidence / number_of_words if number_of_words > 0 else None
+
+
+def combine_segment_alternatives(results):
+    '''
+    For the responses made of several consecutive segments, each with its own list of alternatives
+    (results[i]['alternatives'][k]['transcript']), such as IBM and Google Cloud: see combine_alternatives().
+    '''
+    return combine_alternatives([[alternative.get('transcript', '') for alternative in result.get('alternatives', [])] for result in results])
+
+
+def combine_alternatives(segments):
+    '''
+    Returns the N-best alternative transcriptions of consecutive segments (e.g. the chunks of a segmented speech file), where
+    segments[i] is the list of the alternatives of the i-th segment: the k-th alternative transcription is made of the k-th
+    alternative of each segment, or of its best alternative if the segment has fewer than k+1 alternatives.
+    '''
+    segments = [[alternative.strip() for alternative in segment] for segment in segments]
+    segments = [segment for segment in segments if len(segment) > 0]
+    number_of_alternatives = max([len(segment) for segment in segments] + [0])
+    return [' '.join(segment[k] if k < len(segment) else segment[0] for segment in segments) for k in range(number_of_alternatives)]
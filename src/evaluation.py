@@ -0,0 +1,242 @@
+'''
+Evaluation of the predicted transcriptions against the gold transcriptions.
+
+Each speech file is scored against all the systems at once, i.e. all the (ASR engine, variant) pairs and, if enabled,
+their ROVER combination, and the running totals of each system are kept, so that the corpus-level metrics and the
+summary are available at any time (see the setting `fused_evaluation`).
+'''
+
+import codecs
+import json
+import os
+
+import engines
+import metrics
+import rover
+
+
+class Evaluation(object):
+
+    def __init__(self, asr_systems, variant_names, settings, sampled_speech_filepaths=None):
+        '''
+        sampled_speech_filepaths maps each (ASR engine, variant) pair to the set of the speech files it transcribed with adaptive
+        sampling (see benchmark.transcribe_adaptive_sample()): the other speech files are not evaluated for this pair, even if
+        a transcription file from a previous run exists. None means that all the speech files are evaluated.
+        '''
+        self.settings = settings
+        self.sampled_speech_filepaths = sampled_speech_filepaths
+        self.asr_systems = asr_systems
+        self.metric_names = settings.get('general','metrics').split(',')
+        self.long_form_alignment_threshold = settings.getint('general','long_form_alignment_threshold')
+        self.columns = ['file', 'gold', 'len', 'service', 'variant', 'transcript'] + self.metric_names + ['changes', 'corrects', 'subs', 'ins', 'dels']
+        self.count_types = ['corrects', 'deletions', 'insertions', 'substitutions', 'changes', 'tokens_in_gold']
+        if 'cer' in self.metric_names:
+            self.count_types += ['characters_in_gold', 'character_edits']
+        if 'oracle_wer' in self.metric_names:
+            self.count_types += ['oracle_changes']
+
+        # Each (ASR engine, variant) pair is evaluated as a separate system
+        self.systems = [(asr_system, variant_name) for variant_name in variant_names for asr_system in asr_systems]
+        # The combination of the ASR engines is evaluated as a virtual ASR engine named rover (see rover.py)
+        self.rover_systems = []
+        if settings.getboolean('rover','enabled'):
+            self.rover_asr_systems = settings.get('rover','asr_systems').split(',') if settings.get('rover','asr_systems') != '' else asr_systems
+            self.rover_alpha = settings.getfloat('rover','alpha')
+            self.rover_systems = [('rover', variant_name) for variant_name in variant_names]
+        self.use_confidences = len(self.rover_systems) > 0 and self.rover_alpha < 1
+
+        self.number_of_speech_files = 0
+        self.number_of_edits = {}
+        self.number_of_empty_predicted_transcription_txt_files = {}
+        self.number_of_missing_predicted_transcription_txt_files = {}
+        self.all_stats = {}
+        self.all_predicted_transcription_files = {}
+        for system in self.systems + self.rover_systems:
+            self.number_of_edits[system] = {count_type: 0 for count_type in self.count_types}
+            self.number_of_empty_predicted_transcription_txt_files[system] = 0
+            self.number_of_missing_predicted_transcription_txt_files[system] = 0
+            self.all_stats[system] = []
+            all_predicted_transcription_filepath = 'all_predicted_transcriptions_' + get_system_filename_suffix(system) + '.txt'
+            self.all_predicted_transcription_files[system] = codecs.open(all_predicted_transcription_filepath, 'w', settings.get('general','predicted_transcription_encoding'))
+        all_gold_transcription_filepath = 'all_gold_transcriptions.txt'
+        self.all_gold_transcription_file = codecs.open(all_gold_transcription_filepath, 'w', settings.get('general','gold_transcription_encoding'))
+
+    def add_speech_file(self, speech_filepath, predicted_transcriptions=None):
+        '''
+        Score the predicted transcriptions of speech_filepath, and add them to the running totals.
+        predicted_transcriptions maps systems to their transcription of speech_filepath (e.g. as returned by
+        benchmark.transcribe_speech_file()); the transcriptions of the other systems are read from the transcription files.
+        '''
+        settings = self.settings
+        if self.sampled_speech_filepaths is not None and not any(speech_filepath in sampled_speech_filepaths
+                                                                 for sampled_speech_filepaths in self.sampled_speech_filepaths.values()):
+            return
+        gold_transcription = read_gold_transcription(speech_filepath, settings)
+        self.all_gold_transcription_file.write('{0}\n'.format(gold_transcription))
+        self.number_of_speech_files += 1
+        evaluated_systems = []
+        normalized_predicted_transcriptions = []
+        alternatives = []
+        confidences = {}
+        for system in self.systems:
+            asr_system, variant_name = system
+            if self.sampled_speech_filepaths is not None and speech_filepath not in self.sampled_speech_filepaths.get(system, ()):
+                continue
+            predicted_transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + get_system_filename_suffix(system)
+            predicted_transcription_txt_filepath = predicted_transcription_filepath_base  + '.txt'
+
+            if predicted_transcriptions is not None and system in predicted_transcriptions:
+                predicted_transcription = predicted_transcriptions[system].strip()
+                if len(predicted_transcription) == 0:
+                    self.number_of_empty_predicted_transcription_txt_files[system] += 1
+            elif not os.path.isfile(predicted_transcription_txt_filepath):
+                # With adaptive sampling but without transcription in this run, only the speech files with a transcription file are evaluated
+                if settings.getboolean('adaptive_sampling','enabled'): continue
+                self.number_of_missing_predicted_transcription_txt_files[system] += 1
+                predicted_transcription = ''
+            else:
+                predicted_transcription = codecs.open(predicted_transcription_txt_filepath, 'r', settings.get('general','predicted_transcription_encoding')).read().strip()
+                if len(predicted_transcription) == 0:
+                    #print('predicted_transcription_txt_filepath {0} is empty'.format(predicted_transcription_txt_filepath))
+                    self.number_of_empty_predicted_transcription_txt_files[system] += 1
+
+            predicted_transcription = metrics.normalize_text(predicted_transcription, lower_case=True, remove_punctuation=True,write_numbers_in_letters=True)
+            self.all_predicted_transcription_files[system].write('{0}\n'.format(predicted_transcription))
+            evaluated_systems.append(system)
+            normalized_predicted_transcriptions.append(predicted_transcription)
+            asr_responses = []
+            if 'oracle_wer' in self.metric_names or self.use_confidences:
+                asr_responses = read_asr_responses(predicted_transcription_filepath_base + '.json', settings)
+            if 'oracle_wer' in self.metric_names:
+                alternatives.append(read_alternatives(asr_system, asr_responses))
+            if self.use_confidences:
+                confidences[system] = read_confidence(asr_system, asr_responses)
+
+        for rover_system in self.rover_systems:
+            combined_systems = [system for system in evaluated_systems if system[1] == rover_system[1] and system[0] in self.rover_asr_systems]
+            if len(combined_systems) == 0: continue
+            combined_transcriptions = [normalized_predicted_transcriptions[evaluated_systems.index(system)] for system in combined_systems]
+            predicted_transcription = rover.combine(combined_transcriptions, [confidences.get(system) for system in combined_systems], self.rover_alpha,
+                                                    settings.getfloat('rover','null_confidence'), settings.getfloat('rover','default_confidence'))
+            if len(predicted_transcription) == 0:
+                self.number_of_empty_predicted_transcription_txt_files[rover_system] += 1
+            self.all_predicted_transcription_files[rover_system].write('{0}\n'.format(predicted_transcription))
+            evaluated_systems.append(rover_system)
+            normalized_predicted_transcriptions.append(predicted_transcription)
+            alternatives.append([])
+
+        # One word alignment per system (and one character-level edit distance if cer is requested) gives all the metrics
+        all_scores = metrics.compute_metrics_many(gold_transcription, normalized_predicted_transcriptions, self.metric_names, self.long_form_alignment_threshold,
+                                                  alternatives if 'oracle_wer' in self.metric_names else None)
+        for system, predicted_transcription, scores in zip(evaluated_systems, normalized_predicted_transcriptions, all_scores):
+            for count_type in self.count_types:
+                self.number_of_edits[system][count_type] += scores[count_type]
+            stats = {
+                'file': speech_filepath, 'gold': gold_transcription, 'len': scores['tokens_in_gold'], 'service': system[0], 'variant': system[1],
+                'transcript': predicted_transcription,
+                'changes': scores['changes'], 'corrects': scores['corrects'], 'subs': scores['substitutions'], 'ins': scores['insertions'], 'dels': scores['deletions']
+            }
+            for metric_name in self.metric_names:
+                stats[metric_name] = scores[metric_name]
+            self.all_stats[system].append(stats)
+
+    def get_corpus_scores(self, system):
+        return metrics.aggregate_metrics(self.number_of_edits[system], self.metric_names)
+
+    def print_running_totals(self):
+        print('Running totals after {0} speech files: {1}'.format(self.number_of_speech_files, '\t; '.join(
+              '{0} {1}'.format(get_system_name(system), ' '.join('{0}: {1:.5f}%'.format(metric_name, score*100) for metric_name, score in self.get_corpus_scores(system).items()))
+              for system in self.systems + self.rover_systems)))
+
+    def print_summary(self, number_of_speech_files):
+        for system in self.systems + self.rover_systems:
+            corpus_scores = self.get_corpus_scores(system)
+            number_of_edits = self.number_of_edits[system]
+            print('{0}\t{1}\t(deletions: {2}\t; insertions: {3}\t; substitutions: {4}\t; number_of_tokens_in_gold = {5})'.
+                  format(get_system_name(system), '\t; '.join('{0}: {1:.5f}%'.format(metric_name, corpus_scores[metric_name]*100) for metric_name in self.metric_names),
+                         number_of_edits['deletions'], number_of_edits['insertions'], number_of_edits['substitutions'], number_of_edits['tokens_in_gold']))
+            print('Number of speech files: {0}'.format(number_of_speech_files))
+            print('Number of missing predicted prescription files: {0}'.format(self.number_of_missing_predicted_transcription_txt_files[system]))
+            print('Number of empty predicted prescription files: {0}'.format(self.number_of_empty_predicted_transcription_txt_files[system]))
+
+    def write_summary(self, summary_filepath):
+        '''
+        Atomically write the per-file scores of all the systems scored so far to summary_filepath (CSV).
+        '''
+        import pandas as pd
+        # Grouped by ASR engine, then by variant
+        systems = sorted(self.systems + self.rover_systems, key=lambda system: (self.asr_systems + ['rover']).index(system[0]))
+        df = pd.DataFrame([stats for system in systems for stats in self.all_stats[system]], columns=self.columns)
+        df = df.astype(dtype= dict({'len': 'int', 'changes': 'int', 'corrects': 'int', 'subs': 'int', 'ins': 'int', 'dels': 'int'},
+                                   **{metric_name: 'float' for metric_name in self.metric_names}))
+        temporary_summary_filepath = summary_filepath + '.tmp'
+        df.to_csv(temporary_summary_filepath)
+        os.replace(temporary_summary_filepath, summary_filepath)
+
+    def close(self):
+        self.all_gold_transcription_file.close()
+        for all_predicted_transcription_file in self.all_predicted_transcription_files.values():
+            all_predicted_transcription_file.close()
+
+
+def get_system_filename_suffix(system):
+    '''
+    Suffix of the transcription files of system, an (ASR engine, variant) pair, e.g. google or google_snr10
+    '''
+    asr_system, variant_name = system
+    return asr_system if variant_name == 'clean' else asr_system + '_' + variant_name
+
+
+def get_system_name(system):
+    '''
+    Name of system, an (ASR engine, variant) pair, in the console output, e.g. google or google (snr10)
+    '''
+    asr_system, variant_name = system
+    return asr_system if variant_name == 'clean' else '{0} ({1})'.format(asr_system, variant_name)
+
+
+def read_asr_responses(predicted_transcription_json_filepath, settings):
+    '''
+    Returns the raw ASR responses saved by transcribe.transcribe(), as a list of (transcription, transcription_json) pairs:
+    a single pair, or, if the speech file was segmented, one pair per chunk in order. Returns an empty list if there is none.
+    '''
+    if not os.path.isfile(predicted_transcription_json_filepath): return []
+    results = json.load(codecs.open(predicted_transcription_json_filepath, 'r', settings.get('general','predicted_transcription_encoding')))
+    if 'chunks' in results:
+        return [(chunk_result['transcription'], chunk_result['transcription_json']) for chunk_result in results['chunks']]
+    return [(results['transcription'], results.get('transcription_json'))]
+
+
+def read_alternatives(asr_system, asr_responses):
+    '''
+    Returns the normalized N-best alternative transcriptions found in the raw ASR responses of asr_system (see read_asr_responses()),
+    or an empty list if there are none. For a segmented speech file, the k-th alternative is made of the k-th alternative of each chunk.
+    '''
+    alternatives = engines.combine_alternatives([engines.get_alternatives(asr_system, transcription_json) for transcription, transcription_json in asr_responses])
+    return [metrics.normalize_text(alternative, lower_case=True, remove_punctuation=True, write_numbers_in_letters=True) for alternative in alternatives]
+
+
+def read_confidence(asr_system, asr_responses):
+    '''
+    Returns the confidence of the transcription found in the raw ASR responses of asr_system (see read_asr_responses()),
+    or None if there is none. For a segmented speech file, the average confidence of the chunks, weighted by their number of words.
+    '''
+    total_confidence = 0
+    number_of_words = 0
+    for transcription, transcription_json in asr_responses:
+        confidence = engines.get_confidence(asr_system, transcription_json)
+        if confidence is None: continue
+        chunk_number_of_words = max(len(transcription.split()), 1)
+        total_confidence += confidence * chunk_number_of_words
+        number_of_words += chunk_number_of_words
+    return total_confidence / number_of_words if number_of_words > 0 else None
+
+
+def read_gold_transcription(speech_filepath, settings):
+    '''
+    Returns the normalized gold transcription of speech_filepath.
+    '''
+    gold_transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + 'gold'
+    gold_transcription_filepath_text = gold_transcription_filepath_base  + '.txt'
+    gold_transcription = codecs.open(gold_transcription_filepath_text, 'r', settings.get('general','gold_transcription_encoding')).read()
+    return metrics.normalize_text(gold_transcription, lower_case=True, remove_punctuation=True,write_numbers_in_letters=True)
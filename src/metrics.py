@@ -180,6 +180,399 @@ def wer(ref, hyp ,debug=False):
     return {'changes': numSub + numDel + numIns, 'corrects':numCor, 'substitutions':numSub, 'insertions':numIns, 'deletions':numDel}
 
 
+class PreparedReference(object):
+    '''
+    A reference sequence preprocessed once to be compared with many hypotheses, e.g. the transcriptions of several
+    ASR engines and their N-best alternatives.
+
+    The comparisons use the bit-parallel algorithm of Myers (1999) in the formulation of Hyyrö (2001): the reference
+    is turned into one bit mask per distinct token (its vocabulary), and each DP column is held in two integers used
+    as bit vectors, so the cost is O(len(hyp)) integer operations instead of O(len(ref)*len(hyp)) Python steps.
+
+    Works with any sequences of hashable elements, e.g. strings (characters) or lists of tokens.
+    '''
+
+    def __init__(self, ref):
+        self.ref = ref
+        # pattern_masks[token] has bit i set if ref[i] == token
+        pattern_masks = {}
+        for i, token in enumerate(ref):
+            pattern_masks[token] = pattern_masks.get(token, 0) | (1 << i)
+        self._set_pattern_masks(len(ref), pattern_masks)
+
+    @classmethod
+    def from_token_sets(cls, token_sets):
+        '''
+        A reference whose i-th position matches any token of token_sets[i], e.g. the slots of a word transition network (see rover.py).
+
+        >>> PreparedReference.from_token_sets([{'who', 'how'}, {'is'}, {'there', 'their'}]).distance("how is their cat".split())
+        1
+        '''
+        reference = cls.__new__(cls)
+        reference.ref = token_sets
+        pattern_masks = {}
+        for i, token_set in enumerate(token_sets):
+            for token in token_set:
+                pattern_masks[token] = pattern_masks.get(token, 0) | (1 << i)
+        reference._set_pattern_masks(len(token_sets), pattern_masks)
+        return reference
+
+    def _set_pattern_masks(self, length, pattern_masks):
+        self.length = length
+        self.pattern_masks = pattern_masks
+        self.mask = (1 << self.length) - 1
+        self.top = 1 << max(self.length - 1, 0)
+
+    def matches(self, i, token):
+        '''
+        Whether the i-th position of the reference matches token.
+        '''
+        return (self.pattern_masks.get(token, 0) >> i) & 1 == 1
+
+    def _columns(self, hyp):
+        '''
+        Yields, for each token of hyp, the vertical positive and negative deltas of the next DP column,
+        and the edit distance between ref and the prefix of hyp ending with this token.
+        '''
+        pattern_masks = self.pattern_masks
+        mask = self.mask
+        top = self.top
+        pv = mask  # vertical positive deltas
+        mv = 0     # vertical negative deltas
+        distance = self.length
+        for token in hyp:
+            eq = pattern_masks.get(token, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & top: distance += 1
+            elif mh & top: distance -= 1
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+            yield pv, mv, distance
+
+    def distance(self, hyp):
+        '''
+        Edit distance between ref and hyp.
+
+        >>> PreparedReference("kitten").distance("sitting")
+        3
+        >>> PreparedReference("who is there".split()).distance("is there".split())
+        1
+        '''
+        if self.length == 0: return len(hyp)
+        distance = self.length
+        for pv, mv, distance in self._columns(hyp):
+            pass
+        return distance
+
+    def alignment(self, hyp):
+        '''
+        Returns an optimal alignment between ref and hyp, as the list of the aligned (ref_index, hyp_index) pairs in order,
+        where ref_index is None for an insertion and hyp_index is None for a deletion.
+        The DP columns are kept as bit vectors, and the backtrace follows the same preferences as wer()
+        (match, then substitution, then insertion, then deletion).
+
+        >>> PreparedReference("who is there".split()).alignment("is there a cat".split())
+        [(0, None), (1, 0), (2, 1), (None, 2), (None, 3)]
+        '''
+        columns = [(self.mask, 0)] + [(pv, mv) for pv, mv, distance in self._columns(hyp)] if self.length > 0 else None
+
+        def cost(i, j):
+            # D[i][j] = D[0][j] + the sum of the vertical deltas of column j above row i
+            pv, mv = columns[j]
+            rows_mask = (1 << i) - 1
+            return j + bin(pv & rows_mask).count('1') - bin(mv & rows_mask).count('1')
+
+        aligned_pairs = []
+        i = self.length
+        j = len(hyp)
+        while i > 0 or j > 0:
+            if i == 0:
+                j -= 1
+                aligned_pairs.append((None, j))
+            elif j == 0:
+                i -= 1
+                aligned_pairs.append((i, None))
+            elif self.matches(i-1, hyp[j-1]):
+                i -= 1
+                j -= 1
+                aligned_pairs.append((i, j))
+            else:
+                current_cost = cost(i, j)
+                if cost(i-1, j-1) + 1 == current_cost:
+                    i -= 1
+                    j -= 1
+                    aligned_pairs.append((i, j))
+                elif cost(i, j-1) + 1 == current_cost:
+                    j -= 1
+                    aligned_pairs.append((None, j))
+                else:
+                    i -= 1
+                    aligned_pairs.append((i, None))
+        aligned_pairs.reverse()
+        return aligned_pairs
+
+    def edit_counts(self, hyp):
+        '''
+        Same edit counts as wer(ref, hyp), from the alignment().
+        '''
+        counts = {'corrects': 0, 'substitutions': 0, 'insertions': 0, 'deletions': 0}
+        for i, j in self.alignment(hyp):
+            if i is None:
+                counts['insertions'] += 1
+            elif j is None:
+                counts['deletions'] += 1
+            elif self.matches(i, hyp[j]):
+                counts['corrects'] += 1
+            else:
+                counts['substitutions'] += 1
+        counts['changes'] = counts['substitutions'] + counts['insertions'] + counts['deletions']
+        return counts
+
+
+def levenshtein_distance(ref, hyp):
+    '''
+    Edit distance between two sequences, see PreparedReference.
+
+    >>> levenshtein_distance("kitten", "sitting")
+    3
+    '''
+    return PreparedReference(ref).distance(hyp)
+
+
+def wer_many(ref, hyps, long_form_alignment_threshold=None, reference=None):
+    '''
+    Compare one reference with many hypotheses, preprocessing the reference only once
+    (or never, if reference is ref already prepared with PreparedReference(ref)).
+
+    Returns the list of the edit counts of each hypothesis (same as wer(ref, hyp)), and the index of the
+    hypothesis with the fewest changes (the oracle, e.g. among the N-best alternatives of an ASR engine).
+
+    >>> edits, oracle_index = wer_many("who is there".split(), ["is there a cat".split(), "who is cat".split()])
+    >>> [edit['changes'] for edit in edits], oracle_index
+    ([3, 1], 1)
+    '''
+    if long_form_alignment_threshold is None: long_form_alignment_threshold = DEFAULT_LONG_FORM_ALIGNMENT_THRESHOLD
+    if reference is None: reference = PreparedReference(ref)
+    edits = [align(ref, hyp, long_form_alignment_threshold, reference) for hyp in hyps]
+    oracle_index = min(range(len(hyps)), key=lambda k: edits[k]['changes']) if len(hyps) > 0 else None
+    return edits, oracle_index
+
+
+SUPPORTED_METRICS = ['wer', 'mer', 'wil', 'cer', 'oracle_wer']
+
+
+def word_metrics(edits):
+    '''
+    Compute the word error rate (WER), match error rate (MER) and word information lost (WIL)
+    from edit counts such as the ones returned by wer(), or their sums over a corpus.
+
+    Reference: Morris et al., "From WER and RIL to MER and WIL", Interspeech 2004.
+    '''
+    hits = edits['corrects']
+    substitutions = edits['substitutions']
+    deletions = edits['deletions']
+    insertions = edits['insertions']
+    number_of_tokens_in_gold = hits + substitutions + deletions
+    number_of_tokens_in_predicted = hits + substitutions + insertions
+    number_of_alignment_slots = hits + substitutions + deletions + insertions
+    results = {}
+    results['wer'] = (substitutions + deletions + insertions) / max(number_of_tokens_in_gold, 1)
+    results['mer'] = (substitutions + deletions + insertions) / max(number_of_alignment_slots, 1)
+    if number_of_tokens_in_gold == 0 or number_of_tokens_in_predicted == 0:
+        results['wil'] = 1.0
+    else:
+        results['wil'] = 1 - (hits / number_of_tokens_in_gold) * (hits / number_of_tokens_in_predicted)
+    return results
+
+
+def _next_row_costs(row, token, hyp, offsets):
+    '''
+    Next row of the Levenshtein DP between a reference and every prefix of hyp (numpy integer array),
+    given row, the DP row of the reference tokens before token, and offsets = numpy.arange(len(row)).
+
+    Substitutions and deletions only depend on the previous row, and the insertion recurrence
+    cur[j] = min(cur[j], cur[j-1] + 1) is a running minimum of cur[k] - k, shifted back by j.
+    '''
+    current = numpy.empty_like(row)
+    current[0] = row[0] + 1
+    numpy.minimum(row[:-1] + (hyp != token), row[1:] + 1, out=current[1:])
+    current -= offsets
+    numpy.minimum.accumulate(current, out=current)
+    current += offsets
+    return current
+
+
+def _backtrace(ref, hyp, top_row, top, bottom, column, counts, small_problem_size):
+    '''
+    Follow the backtrace of wer() between ref and hyp (numpy integer arrays) from the DP cell (bottom, column)
+    up to the row top, given top_row, the DP row top (up to column), and accumulate the edit counts in counts.
+    Returns the column where the backtrace reaches the row top (0 if top is 0, where only insertions are left).
+
+    The rows are split into BACKTRACE_PARTS parts, in the spirit of Hirschberg's divide and conquer: the first row of each
+    part is recomputed from top_row, then the backtrace is followed in each part, from the bottom one up to the top one.
+    Only O(BACKTRACE_PARTS * log(len(ref))) DP rows are kept in memory, and the alignment is the one chosen by wer(), ties included.
+    '''
+    if bottom - top <= 1 or (bottom - top + 1) * (column + 1) <= small_problem_size:
+        # Small enough to keep all the DP rows of the block
+        hyp = hyp[:column]
+        offsets = numpy.arange(column + 1)
+        rows = [top_row[:column+1]]
+        for token in ref[top:bottom]:
+            rows.append(_next_row_costs(rows[-1], token, hyp, offsets))
+        i = bottom
+        j = column
+        while i > top:
+            if j > 0 and ref[i-1] == hyp[j-1]:
+                counts['corrects'] += 1
+                i -= 1
+                j -= 1
+            elif j > 0 and rows[i-1-top][j-1] + 1 == rows[i-top][j]:
+                counts['substitutions'] += 1
+                i -= 1
+                j -= 1
+            elif j > 0 and rows[i-top][j-1] + 1 == rows[i-top][j]:
+                counts['insertions'] += 1
+                j -= 1
+            else:
+                counts['deletions'] += 1
+                i -= 1
+        if top == 0:
+            counts['insertions'] += j
+            j = 0
+        return j
+    # Checkpoint rows at the start of each part, then backtrace the parts from the bottom one to the top one
+    part_size = -(-(bottom - top) // BACKTRACE_PARTS)
+    part_tops = list(range(top, bottom, part_size))
+    offsets = numpy.arange(column + 1)
+    row = top_row[:column+1]
+    part_top_rows = [row]
+    for i in range(top, part_tops[-1]):
+        row = _next_row_costs(row, ref[i], hyp[:column], offsets)
+        if (i + 1 - top) % part_size == 0:
+            part_top_rows.append(row)
+    part_bottoms = part_tops[1:] + [bottom]
+    for part_top, part_bottom, part_top_row in reversed(list(zip(part_tops, part_bottoms, part_top_rows))):
+        column = _backtrace(ref, hyp, part_top_row, part_top, part_bottom, column, counts, small_problem_size)
+    return column
+
+
+# Number of parts the rows are split into by each level of _backtrace()
+BACKTRACE_PARTS = 16
+
+
+def wer_long_form(ref, hyp, small_problem_size=100000):
+    '''
+    Same edit counts as wer(), but with memory O(len(hyp) * log(len(ref))) instead of (len(ref)+1)*(len(hyp)+1)
+    Python integers, which makes it usable on chapter-level or meeting-level transcripts (10k+ tokens per side).
+
+    Uses a divide and conquer over the rows of the DP (see _backtrace()), with vectorized numpy rows;
+    blocks with fewer than small_problem_size DP cells are backtraced directly.
+    The alignment, hence the number of substitutions, insertions and deletions, is the same as wer()'s, ties included.
+
+    >>> wer_long_form("blue had range of okay".split(), "blue hydrangea bouquet".split(), small_problem_size=1) == wer("blue had range of okay".split(), "blue hydrangea bouquet".split())
+    True
+    '''
+    # Map tokens to integer ids so that comparisons are vectorized
+    vocabulary = {}
+    ref_ids = numpy.array([vocabulary.setdefault(token, len(vocabulary)) for token in ref], dtype=numpy.int64)
+    hyp_ids = numpy.array([vocabulary.setdefault(token, len(vocabulary)) for token in hyp], dtype=numpy.int64)
+    counts = {'corrects': 0, 'substitutions': 0, 'insertions': 0, 'deletions': 0}
+    _backtrace(ref_ids, hyp_ids, numpy.arange(len(hyp_ids) + 1), 0, len(ref_ids), len(hyp_ids), counts, small_problem_size)
+    counts['changes'] = counts['substitutions'] + counts['insertions'] + counts['deletions']
+    return counts
+
+
+DEFAULT_LONG_FORM_ALIGNMENT_THRESHOLD = 2000
+
+
+def align(ref, hyp, long_form_alignment_threshold=DEFAULT_LONG_FORM_ALIGNMENT_THRESHOLD, reference=None):
+    '''
+    Return the edit counts between the token lists ref and hyp (same as wer()), using the bit-parallel alignment of
+    PreparedReference, or wer_long_form() when ref or hyp has more than long_form_alignment_threshold tokens.
+    A threshold lower or equal to 0 disables the long-form mode.
+    reference is ref already prepared with PreparedReference(ref), if any, e.g. to compare ref with many hypotheses.
+    '''
+    if 0 < long_form_alignment_threshold < max(len(ref), len(hyp)):
+        return wer_long_form(ref, hyp)
+    if reference is None: reference = PreparedReference(ref)
+    return reference.edit_counts(hyp)
+
+
+def compute_metrics(gold_transcription, predicted_transcription, metric_names=('wer',),
+                    long_form_alignment_threshold=DEFAULT_LONG_FORM_ALIGNMENT_THRESHOLD, alternatives=None):
+    '''
+    Score a normalized predicted transcription against a normalized gold transcription.
+    See compute_metrics_many().
+    '''
+    return compute_metrics_many(gold_transcription, [predicted_transcription], metric_names, long_form_alignment_threshold,
+                                None if alternatives is None else [alternatives])[0]
+
+
+def compute_metrics_many(gold_transcription, predicted_transcriptions, metric_names=('wer',),
+                         long_form_alignment_threshold=DEFAULT_LONG_FORM_ALIGNMENT_THRESHOLD, alternatives=None):
+    '''
+    Score several normalized predicted transcriptions (e.g. one per ASR engine) against the same normalized gold transcription.
+    The gold transcription is split and preprocessed only once (see PreparedReference).
+
+    The word-level metrics (wer, mer, wil) all come from a single alignment per predicted transcription.
+    cer is computed with a character-level edit distance over the same normalized strings.
+    oracle_wer is the WER of the best hypothesis among the predicted transcription and its alternatives
+    (alternatives[k] is the list of normalized N-best alternatives of predicted_transcriptions[k]).
+
+    Returns, for each predicted transcription, a dictionary with the edit counts of wer(), 'tokens_in_gold', and the requested metrics.
+    If cer is requested, the dictionary also contains 'characters_in_gold' and 'character_edits', and if oracle_wer is requested,
+    'oracle_changes', so that corpus-level metrics can be obtained by summing the counts and calling aggregate_metrics().
+    '''
+    for metric_name in metric_names:
+        if metric_name not in SUPPORTED_METRICS:
+            raise ValueError('Invalid metric "{0}". Supported metrics are {1}.'.format(metric_name, SUPPORTED_METRICS))
+    gold_tokens = gold_transcription.split(' ')
+    gold_reference = PreparedReference(gold_tokens)
+    if 'cer' in metric_names:
+        gold_characters = PreparedReference(gold_transcription)
+    all_results = []
+    for k, predicted_transcription in enumerate(predicted_transcriptions):
+        # The predicted transcription comes first, so that it is the oracle if no alternative is better
+        hyps = [predicted_transcription.split(' ')]
+        if 'oracle_wer' in metric_names and alternatives is not None:
+            hyps += [alternative.split(' ') for alternative in alternatives[k]]
+        edits, oracle_index = wer_many(gold_tokens, hyps, long_form_alignment_threshold, gold_reference)
+        results = edits[0]
+        results['tokens_in_gold'] = len(gold_tokens)
+        if 'cer' in metric_names:
+            results['characters_in_gold'] = len(gold_transcription)
+            results['character_edits'] = gold_characters.distance(predicted_transcription)
+        if 'oracle_wer' in metric_names:
+            results['oracle_changes'] = edits[oracle_index]['changes']
+        results.update(aggregate_metrics(results, metric_names))
+        all_results.append(results)
+    return all_results
+
+
+def aggregate_metrics(counts, metric_names=('wer',)):
+    '''
+    Compute the requested metrics from counts returned by compute_metrics(), or their sums over a corpus.
+    '''
+    results = {}
+    word_level_metrics = word_metrics(counts)
+    for metric_name in metric_names:
+        if metric_name == 'cer':
+            results['cer'] = counts['character_edits'] / max(counts['characters_in_gold'], 1)
+        elif metric_name == 'wer':
+            # Same token count as the benchmark has always used: len(gold_transcription.split(' '))
+            results['wer'] = counts['changes'] / max(counts['tokens_in_gold'], 1)
+        elif metric_name == 'oracle_wer':
+            results['oracle_wer'] = counts['oracle_changes'] / max(counts['tokens_in_gold'], 1)
+        else:
+            results[metric_name] = word_level_metrics[metric_name]
+    return results
+
+
 if __name__ == "__main__":
     import doctest
     #doctest.testmod()
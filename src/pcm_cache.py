@@ -0,0 +1,149 @@
+'''
+Persistent on-disk cache of decoded and resampled PCM audio (16 kHz, 16-bit, mono), shared across runs.
+
+All the cached audio is packed in a single data file, and an index (JSON file) gives the offset and length of each
+speech file in the data file. The data file is read through mmap, so that cached audio is returned as a zero-copy
+memoryview slice instead of being decoded and resampled again. New entries are appended to the data file, and the
+data file is only remapped when get() needs an entry that was appended after the last mapping.
+'''
+
+import json
+import mmap
+import os
+import threading
+import time
+
+import utils
+
+PCM_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+# Fraction of max_size_in_bytes used by the cached audio after a compaction of the data file
+COMPACTION_TARGET = 0.9
+
+
+class PcmCache(object):
+    '''
+    Least recently used entries are evicted when the total size of the cached audio would exceed max_size_in_bytes.
+    The data file is compacted when the space left by evicted entries is needed; entries are then evicted down to
+    COMPACTION_TARGET of max_size_in_bytes, so that the data file isn't rewritten for each new entry once the cache is full.
+    '''
+
+    def __init__(self, cache_folder, max_size_in_bytes, index_save_interval=100):
+        utils.create_folder_if_not_exists(cache_folder)
+        self.data_filepath = os.path.join(cache_folder, 'pcm_cache.bin')
+        self.index_filepath = os.path.join(cache_folder, 'pcm_cache_index.json')
+        self.max_size_in_bytes = max_size_in_bytes
+        self.index_save_interval = index_save_interval
+        self.number_of_unsaved_changes = 0
+        self.lock = threading.RLock()
+        self.index = {}
+        if os.path.isfile(self.index_filepath) and os.path.isfile(self.data_filepath):
+            with open(self.index_filepath, 'r') as index_file:
+                self.index = json.load(index_file)
+            # Drop entries that point past the end of the data file (e.g. if the data file was truncated)
+            data_file_size = os.path.getsize(self.data_filepath)
+            self.index = {key: entry for key, entry in self.index.items() if entry['offset'] + entry['length'] <= data_file_size}
+        else:
+            open(self.data_filepath, 'wb').close()
+        self.mmap = None
+        self._remap()
+
+    @staticmethod
+    def get_key(speech_filepath):
+        '''
+        A speech file is identified by its absolute path, size and modification time,
+        so that the cache entry is not used if the speech file changes.
+        '''
+        stat = os.stat(speech_filepath)
+        return '{0}|{1}|{2}'.format(os.path.abspath(speech_filepath), stat.st_size, stat.st_mtime)
+
+    def _remap(self):
+        # Views returned by get() keep the previous mmap alive, so it is not closed explicitly.
+        with open(self.data_filepath, 'rb') as data_file:
+            if os.path.getsize(self.data_filepath) == 0:
+                self.mmap = None
+            else:
+                self.mmap = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_size(self):
+        '''
+        Total size in bytes of the cached audio.
+        '''
+        return sum(entry['length'] for entry in self.index.values())
+
+    def get(self, speech_filepath):
+        '''
+        Returns the cached PCM audio of speech_filepath as a memoryview, or None if it isn't in the cache.
+        '''
+        key = self.get_key(speech_filepath)
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            if self.mmap is None or len(self.mmap) < entry['offset'] + entry['length']:
+                # The entry was added after the data file was last mapped
+                self._remap()
+            entry['last_access'] = time.time()
+            return memoryview(self.mmap)[entry['offset']:entry['offset'] + entry['length']]
+
+    def put(self, speech_filepath, pcm_data):
+        '''
+        Add the PCM audio pcm_data (bytes) of speech_filepath to the cache, evicting least recently used entries if needed.
+        Returns pcm_data.
+        '''
+        key = self.get_key(speech_filepath)
+        with self.lock:
+            if len(pcm_data) > self.max_size_in_bytes:
+                return pcm_data
+            self.index.pop(key, None)
+            self._evict(len(pcm_data))
+            with open(self.data_filepath, 'ab') as data_file:
+                offset = data_file.tell()
+                data_file.write(pcm_data)
+            self.index[key] = {'offset': offset, 'length': len(pcm_data), 'last_access': time.time()}
+            self.number_of_unsaved_changes += 1
+            if self.number_of_unsaved_changes >= self.index_save_interval:
+                self.save_index()
+            return pcm_data
+
+    def _evict(self, needed_size_in_bytes):
+        '''
+        Evict least recently used entries until needed_size_in_bytes more bytes fit in the cache,
+        and compact the data file if the space left by evicted entries is needed.
+        '''
+        cache_size = self.get_size()
+        for key in sorted(self.index, key=lambda key: self.index[key]['last_access']):
+            if cache_size + needed_size_in_bytes <= self.max_size_in_bytes:
+                break
+            cache_size -= self.index.pop(key)['length']
+        if os.path.getsize(self.data_filepath) + needed_size_in_bytes > self.max_size_in_bytes:
+            for key in sorted(self.index, key=lambda key: self.index[key]['last_access']):
+                if cache_size + needed_size_in_bytes <= self.max_size_in_bytes * COMPACTION_TARGET:
+                    break
+                cache_size -= self.index.pop(key)['length']
+            self._compact()
+
+    def _compact(self):
+        '''
+        Rewrite the data file with only the entries that are in the index.
+        '''
+        # Map the entries appended since the last mapping
+        self._remap()
+        compacted_data_filepath = self.data_filepath + '.tmp'
+        with open(compacted_data_filepath, 'wb') as compacted_data_file:
+            for entry in sorted(self.index.values(), key=lambda entry: entry['offset']):
+                new_offset = compacted_data_file.tell()
+                compacted_data_file.write(self.mmap[entry['offset']:entry['offset'] + entry['length']])
+                entry['offset'] = new_offset
+        # The compacted data file is mapped by the next get()
+        self.mmap = None
+        os.replace(compacted_data_filepath, self.data_filepath)
+        self.save_index()
+
+    def save_index(self):
+        with self.lock:
+            temporary_index_filepath = self.index_filepath + '.tmp'
+            with open(temporary_index_filepath, 'w') as index_file:
+                json.dump(self.index, index_file)
+            os.replace(temporary_index_filepath, self.index_filepath)
+            self.number_of_unsaved_changes = 0
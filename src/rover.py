@@ -0,0 +1,81 @@
+'''
+Combination of the transcriptions of several ASR engines with ROVER (Fiscus, "A post-processing system to yield reduced
+word error rates: Recognizer Output Voting Error Reduction (ROVER)", ASRU 1997).
+
+The transcriptions are aligned one after the other into a word transition network (WTN): a sequence of slots, each slot
+holding the words (or NULL, i.e. no word) proposed by each ASR engine at this position. Each slot then votes for the word
+with the highest score alpha * (frequency of the word) + (1 - alpha) * (average confidence of the word).
+
+The alignment of a transcription against the WTN uses the bit-parallel alignment of metrics.PreparedReference, where
+a slot matches all the words it already holds.
+'''
+
+import metrics
+
+NULL = ''
+
+
+class WordTransitionNetwork(object):
+
+    def __init__(self, null_confidence=0.5, default_confidence=0.5):
+        '''
+        null_confidence is the confidence given to NULL (no word) when a transcription has no word in a slot.
+        default_confidence is the confidence given to the words of transcriptions that come without confidence.
+        '''
+        self.null_confidence = null_confidence
+        self.default_confidence = default_confidence
+        self.slots = []   # each slot maps each word to the list of confidences of the transcriptions that have this word in the slot
+        self.number_of_transcriptions = 0
+
+    def add_transcription(self, words, confidence=None):
+        '''
+        Align words (list of tokens) against the WTN, and add them to the WTN.
+        confidence is the confidence of the transcription, used for each of its words (None if unknown).
+        '''
+        if confidence is None: confidence = self.default_confidence
+        if self.number_of_transcriptions == 0:
+            self.slots = [{word: [confidence]} for word in words]
+        else:
+            reference = metrics.PreparedReference.from_token_sets(self.slots)
+            slots = []
+            for i, j in reference.alignment(words):
+                if i is None:
+                    # New slot: NULL for all the previous transcriptions
+                    slots.append({NULL: [self.null_confidence] * self.number_of_transcriptions, words[j]: [confidence]})
+                else:
+                    slot = self.slots[i]
+                    word = NULL if j is None else words[j]
+                    slot.setdefault(word, []).append(self.null_confidence if j is None else confidence)
+                    slots.append(slot)
+            self.slots = slots
+        self.number_of_transcriptions += 1
+
+    def vote(self, alpha=1.0):
+        '''
+        Returns the list of words with the highest score in each slot (NULL is skipped). Ties are broken in favor
+        of the word that was added first, i.e. the ASR engine that comes first.
+        '''
+        words = []
+        for slot in self.slots:
+            best_word = max(slot, key=lambda word: alpha * len(slot[word]) / self.number_of_transcriptions +
+                                                   (1 - alpha) * sum(slot[word]) / len(slot[word]))
+            if best_word != NULL:
+                words.append(best_word)
+        return words
+
+
+def combine(transcriptions, confidences=None, alpha=1.0, null_confidence=0.5, default_confidence=0.5):
+    '''
+    Returns the ROVER combination of transcriptions (list of normalized transcriptions, e.g. one per ASR engine).
+    confidences[k] is the confidence of transcriptions[k], or None if unknown.
+    With alpha = 1, the combination is a majority vote that doesn't use confidences.
+
+    >>> combine(['who is there', 'who was there', 'who is their'])
+    'who is there'
+    >>> combine(['hello world', 'hello', 'hello big world'])
+    'hello world'
+    '''
+    network = WordTransitionNetwork(null_confidence, default_confidence)
+    for k, transcription in enumerate(transcriptions):
+        network.add_transcription(transcription.split(), None if confidences is None else confidences[k])
+    return ' '.join(network.vote(alpha))
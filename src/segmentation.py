@@ -0,0 +1,96 @@
+'''
+Split long speech files at silences so that they can be sent to the ASR APIs as several shorter chunks.
+
+Silences are detected with an energy-based voice activity detection (VAD) over the PCM samples.
+'''
+
+import numpy
+import speech_recognition as sr
+
+
+def get_audio_duration(audio_data):
+    '''
+    Duration in seconds of an sr.AudioData instance.
+    '''
+    return len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+
+
+def compute_frame_energies(audio_data, frame_duration):
+    '''
+    Returns the energy in dBFS of each frame of frame_duration seconds of audio_data.
+    '''
+    # get_raw_data takes care of converting 8-bit unsigned samples to signed samples
+    samples = numpy.frombuffer(audio_data.get_raw_data(convert_width=2), dtype=numpy.int16).astype(numpy.float64)
+    frame_length = max(int(audio_data.sample_rate * frame_duration), 1)
+    number_of_frames = int(numpy.ceil(len(samples) / frame_length))
+    samples = numpy.pad(samples, (0, number_of_frames * frame_length - len(samples)), 'constant')
+    frames = samples.reshape((number_of_frames, frame_length))
+    rms = numpy.sqrt(numpy.mean(frames ** 2, axis=1))
+    return 20 * numpy.log10(numpy.maximum(rms, 1) / 32768)
+
+
+def find_split_points(frame_energies, frame_duration, silence_threshold_db=-35, min_silence_duration=0.3,
+                      min_chunk_duration=5, max_chunk_duration=50):
+    '''
+    Returns the frame indices where the audio should be split.
+
+    A frame is silent if its energy is lower than silence_threshold_db below the loud frames of the file
+    (95th percentile of the frame energies), so that the detection doesn't depend on the recording level.
+    Candidate split points are the middle of the silences lasting at least min_silence_duration seconds.
+    Chunks are made as long as possible without exceeding max_chunk_duration seconds. If a chunk has no
+    candidate split point between min_chunk_duration and max_chunk_duration, it is split at its quietest frame.
+    '''
+    number_of_frames = len(frame_energies)
+    if number_of_frames == 0: return []
+    is_silent = frame_energies < numpy.percentile(frame_energies, 95) + silence_threshold_db
+
+    # Middle of each long enough run of silent frames
+    min_silence_frames = max(int(min_silence_duration / frame_duration), 1)
+    candidates = []
+    run_start = None
+    for frame_index, silent in enumerate(is_silent.tolist() + [False]):
+        if silent and run_start is None:
+            run_start = frame_index
+        elif not silent and run_start is not None:
+            if frame_index - run_start >= min_silence_frames:
+                candidates.append((run_start + frame_index) // 2)
+            run_start = None
+
+    min_chunk_frames = max(int(min_chunk_duration / frame_duration), 1)
+    max_chunk_frames = max(int(max_chunk_duration / frame_duration), min_chunk_frames + 1)
+    split_points = []
+    chunk_start = 0
+    while number_of_frames - chunk_start > max_chunk_frames:
+        window_start = chunk_start + min_chunk_frames
+        window_end = chunk_start + max_chunk_frames
+        window_candidates = [candidate for candidate in candidates if window_start <= candidate <= window_end]
+        if len(window_candidates) > 0:
+            split_point = window_candidates[-1]
+        else:
+            split_point = window_start + int(numpy.argmin(frame_energies[window_start:window_end + 1]))
+        split_points.append(split_point)
+        chunk_start = split_point
+    return split_points
+
+
+def split_on_silence(audio_data, frame_duration=0.03, silence_threshold_db=-35, min_silence_duration=0.3,
+                     min_chunk_duration=5, max_chunk_duration=50):
+    '''
+    Split audio_data (an sr.AudioData instance) at silences. See find_split_points() for the parameters.
+
+    Returns a list of (start_in_seconds, end_in_seconds, chunk) where chunk is an sr.AudioData instance.
+    '''
+    frame_energies = compute_frame_energies(audio_data, frame_duration)
+    split_points = find_split_points(frame_energies, frame_duration, silence_threshold_db=silence_threshold_db,
+                                     min_silence_duration=min_silence_duration, min_chunk_duration=min_chunk_duration,
+                                     max_chunk_duration=max_chunk_duration)
+    frame_length = max(int(audio_data.sample_rate * frame_duration), 1)
+    total_number_of_samples = len(audio_data.frame_data) // audio_data.sample_width
+    boundaries = [0] + [split_point * frame_length for split_point in split_points] + [total_number_of_samples]
+    chunks = []
+    for chunk_start, chunk_end in zip(boundaries[:-1], boundaries[1:]):
+        if chunk_end <= chunk_start: continue
+        chunk = sr.AudioData(audio_data.frame_data[chunk_start * audio_data.sample_width:chunk_end * audio_data.sample_width],
+                             audio_data.sample_rate, audio_data.sample_width)
+        chunks.append((chunk_start / audio_data.sample_rate, chunk_end / audio_data.sample_rate, chunk))
+    return chunks
@@ -0,0 +1,304 @@
+'''
+Daemon mode of the benchmark: a local HTTP/JSON API to transcribe and evaluate speech files without paying the startup
+costs (reading settings.ini, importing the ASR engine libraries, building the API clients, loading models) for each run.
+
+The settings, the ASR engine plugins and their clients, the PCM cache and the pool of worker threads are shared by all the jobs.
+
+API (see the [service] section of settings.ini for the port):
+ - POST /jobs with a JSON body {"folder": "../data/example_dataset_en"} or {"files": ["a.wav", "b.flac"]},
+   and optionally "asr_systems": ["google", "ibm"] (default: asr_systems of settings.ini).
+   Returns {"job_id": ...}.
+ - GET /jobs: status of all the jobs.
+ - GET /jobs/<job_id>: status of the job (number of done transcriptions, corpus-level metrics per ASR engine so far).
+ - GET /jobs/<job_id>/results: per-utterance results as newline-delimited JSON, streamed as the transcriptions are done.
+
+Usage: cd src; python service.py
+E.g.: curl -d '{"folder": "../data/example_dataset_en"}' http://localhost:8020/jobs
+      curl http://localhost:8020/jobs/1/results
+'''
+
+import concurrent.futures
+import configparser
+import http.server
+import itertools
+import json
+import os
+import socketserver
+import threading
+import time
+
+import benchmark
+import engines
+import evaluation
+import metrics
+import telemetry
+import transcribe
+import utils
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    '''
+    HTTP server handling each request in a new thread (http.server.ThreadingHTTPServer requires Python 3.7).
+    '''
+    daemon_threads = True
+
+
+class Job(object):
+    '''
+    Transcription and evaluation of a list of speech files with a list of ASR engines.
+    '''
+
+    def __init__(self, job_id, speech_filepaths, asr_systems, metric_names):
+        self.job_id = job_id
+        self.speech_filepaths = speech_filepaths
+        self.asr_systems = asr_systems
+        self.metric_names = metric_names
+        self.timestamp_submitted = time.time()
+        self.timestamp_ended = None
+        self.results = []
+        self.number_of_planned_transcriptions = len(speech_filepaths) * len(asr_systems)
+        self.number_of_edits = {asr_system: {} for asr_system in asr_systems}
+        self.condition = threading.Condition()
+
+    def is_done(self):
+        return len(self.results) >= self.number_of_planned_transcriptions
+
+    def add_result(self, result, scores=None):
+        with self.condition:
+            self.results.append(result)
+            if scores is not None:
+                number_of_edits = self.number_of_edits[result['asr_system']]
+                for count_type, count in scores.items():
+                    if count_type not in self.metric_names:
+                        number_of_edits[count_type] = number_of_edits.get(count_type, 0) + count
+            if self.is_done():
+                self.timestamp_ended = time.time()
+            self.condition.notify_all()
+
+    def get_status(self):
+        with self.condition:
+            status = {'job_id': self.job_id, 'status': 'done' if self.is_done() else 'running',
+                      'asr_systems': self.asr_systems, 'number_of_speech_files': len(self.speech_filepaths),
+                      'number_of_planned_transcriptions': self.number_of_planned_transcriptions,
+                      'number_of_done_transcriptions': len(self.results),
+                      'number_of_failed_transcriptions': sum(1 for result in self.results if 'error' in result),
+                      'time_elapsed': (self.timestamp_ended or time.time()) - self.timestamp_submitted,
+                      'metrics': {}}
+            for asr_system, number_of_edits in self.number_of_edits.items():
+                if len(number_of_edits) > 0:
+                    status['metrics'][asr_system] = metrics.aggregate_metrics(number_of_edits, self.metric_names)
+            return status
+
+    def iterate_results(self):
+        '''
+        Yields the results of the job as they are added, until the job is done.
+        '''
+        number_of_sent_results = 0
+        while True:
+            with self.condition:
+                while number_of_sent_results == len(self.results) and not self.is_done():
+                    self.condition.wait()
+                new_results = self.results[number_of_sent_results:]
+                done = self.is_done()
+            for result in new_results:
+                yield result
+            number_of_sent_results += len(new_results)
+            if done and number_of_sent_results == len(self.results):
+                return
+
+
+class Service(object):
+    '''
+    Keeps the settings, the ASR engine plugins, the PCM cache and the worker pool warm across jobs.
+    '''
+
+    def __init__(self, settings, settings_filepath='settings.ini'):
+        self.settings = settings
+        self.settings_filepath = settings_filepath
+        self.asr_systems = settings.get('general','asr_systems').split(',')
+        self.metric_names = settings.get('general','metrics').split(',')
+        self.long_form_alignment_threshold = settings.getint('general','long_form_alignment_threshold')
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=settings.getint('service','max_workers'))
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        # Import the ASR engine plugins (and their libraries) once, before the first job
+        for asr_system in self.asr_systems:
+            engines.get_engine(asr_system)
+        if settings.getboolean('pcm_cache','enabled'):
+            transcribe.get_pcm_cache(settings)
+
+    def submit(self, request):
+        '''
+        Start a job described by request (see the API in the module docstring), and return it.
+        '''
+        if not isinstance(request, dict):
+            raise ValueError('The job should be a JSON object.')
+        asr_systems = request.get('asr_systems', self.asr_systems)
+        if not is_list_of_strings(asr_systems):
+            raise ValueError('The "asr_systems" field should be a list of strings.')
+        for asr_system in asr_systems:
+            engines.get_engine(asr_system)  # raises ValueError if asr_system is invalid
+        if 'folder' in request:
+            if not isinstance(request['folder'], str):
+                raise ValueError('The "folder" field should be a string.')
+            speech_file_type, speech_filepaths = benchmark.get_speech_filepaths(request['folder'], self.settings, self.settings_filepath)
+        elif 'files' in request:
+            if not is_list_of_strings(request['files']):
+                raise ValueError('The "files" field should be a list of strings.')
+            speech_filepaths = list(request['files'])
+        else:
+            raise ValueError('The job should have a "folder" or a "files" field.')
+        for speech_filepath in speech_filepaths:
+            if not os.path.isfile(speech_filepath):
+                raise ValueError('Speech file {0} doesn\'t exist.'.format(speech_filepath))
+
+        with self.lock:
+            job = Job(next(self.job_ids), speech_filepaths, asr_systems, self.metric_names)
+            self.jobs[job.job_id] = job
+        telemetry.default_telemetry.add_planned_transcriptions(job.number_of_planned_transcriptions)
+        for speech_filepath in speech_filepaths:
+            self.executor.submit(self.process_speech_file, job, speech_filepath)
+        print('Job {0} submitted: {1} speech files, asr_systems: {2}'.format(job.job_id, len(speech_filepaths), asr_systems))
+        return job
+
+    def process_speech_file(self, job, speech_filepath):
+        '''
+        Decode speech_filepath once, and send it to all the ASR engines of the job in parallel.
+        '''
+        try:
+            audio = transcribe.load_audio(speech_filepath, self.settings)
+        except Exception as e:
+            for asr_system in job.asr_systems:
+                job.add_result({'file': speech_filepath, 'asr_system': asr_system, 'error': 'Could not read the speech file: {0}'.format(e)})
+            return
+        gold_transcription = None
+        gold_transcription_filepath = '.'.join(speech_filepath.split('.')[:-1]) + '_gold.txt'
+        if os.path.isfile(gold_transcription_filepath):
+            gold_transcription = evaluation.read_gold_transcription(speech_filepath, self.settings)
+        for asr_system in job.asr_systems:
+            self.executor.submit(self.process_transcription, job, speech_filepath, asr_system, audio, gold_transcription)
+
+    def process_transcription(self, job, speech_filepath, asr_system, audio, gold_transcription):
+        result = {'file': speech_filepath, 'asr_system': asr_system}
+        timestamp_started = time.time()
+        try:
+            transcription, transcription_skipped = transcribe.transcribe(speech_filepath, asr_system, self.settings, save_transcription=True, audio=audio)
+        except Exception as e:
+            result['error'] = str(e)
+            job.add_result(result)
+            return
+        result['transcription'] = transcription.strip()
+        result['transcription_skipped'] = transcription_skipped
+        result['time_elapsed'] = time.time() - timestamp_started
+        scores = None
+        if gold_transcription is not None:
+            predicted_transcription = metrics.normalize_text(transcription.strip(), lower_case=True, remove_punctuation=True, write_numbers_in_letters=True)
+            scores = metrics.compute_metrics(gold_transcription, predicted_transcription, self.metric_names, self.long_form_alignment_threshold)
+            result['gold'] = gold_transcription
+            for metric_name in self.metric_names:
+                result[metric_name] = scores[metric_name]
+            result['changes'] = scores['changes']
+            result['len'] = scores['tokens_in_gold']
+        job.add_result(result, scores)
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def get_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+
+def is_list_of_strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def make_request_handler(service):
+
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+
+        def send_json(self, status_code, content):
+            body = json.dumps(content, indent=4, sort_keys=True).encode('utf-8')
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def get_job_from_path(self, path_parts):
+            try:
+                job = service.get_job(int(path_parts[1]))
+            except ValueError:
+                job = None
+            if job is None:
+                self.send_json(404, {'error': 'Job {0} not found.'.format(path_parts[1])})
+            return job
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/jobs':
+                self.send_json(404, {'error': 'Unknown path {0}'.format(self.path)})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+                job = service.submit(request)
+            except (ValueError, TypeError) as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            self.send_json(201, {'job_id': job.job_id})
+
+        def do_GET(self):
+            path_parts = self.path.strip('/').split('/')
+            if path_parts == ['jobs']:
+                self.send_json(200, [job.get_status() for job in service.get_jobs()])
+            elif len(path_parts) == 2 and path_parts[0] == 'jobs':
+                job = self.get_job_from_path(path_parts)
+                if job is not None:
+                    self.send_json(200, job.get_status())
+            elif len(path_parts) == 3 and path_parts[0] == 'jobs' and path_parts[2] == 'results':
+                job = self.get_job_from_path(path_parts)
+                if job is None: return
+                # No Content-Length: the results are streamed until the job is done, then the connection is closed
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+                self.end_headers()
+                for result in job.iterate_results():
+                    self.wfile.write((json.dumps(result, sort_keys=True) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+            else:
+                self.send_json(404, {'error': 'Unknown path {0}'.format(self.path)})
+
+        def log_message(self, format, *args):
+            utils.log('{0} - {1}'.format(self.address_string(), format % args))
+
+    return RequestHandler
+
+
+def main():
+
+    # Load setting file
+    settings = configparser.ConfigParser()
+    settings_filepath = 'settings.ini'
+    settings.read(settings_filepath)
+
+    utils.quiet = settings.getboolean('general','quiet')
+    stop_telemetry_exporters = telemetry.start_exporters(settings)
+    service = Service(settings, settings_filepath)
+
+    http_port = settings.getint('service','http_port')
+    http_server = ThreadingHTTPServer(('localhost', http_port), make_request_handler(service))
+    print('ASR benchmark service listening on http://localhost:{0}/jobs'.format(http_port))
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    http_server.server_close()
+    service.executor.shutdown(wait=False)
+    if settings.getboolean('pcm_cache','enabled'):
+        transcribe.get_pcm_cache(settings).save_index()
+    stop_telemetry_exporters()
+
+
+if __name__ == "__main__":
+    main()
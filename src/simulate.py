@@ -0,0 +1,254 @@
+'''
+Capacity planning: predict how long transcribing a corpus would take under candidate per-engine concurrency limits,
+rate limits and retry policies, without sending any request to the ASR APIs.
+
+The latency and error distributions of each ASR engine are built from the `_<asr>.json` files saved by previous runs
+of the benchmark (asr_time_elapsed and asr_could_not_be_reached, per request for segmented speech files; files written
+before asr_could_not_be_reached was saved count as successful requests).
+
+The corpus is replayed through two models:
+ - the loop of benchmark.py as it is: the speech files are transcribed one after the other, each by one ASR engine after
+   the other, with delay_in_seconds_between_transcriptions seconds between speech files, and the chunks of a segmented
+   speech file sent in parallel (at most max_parallel_chunks at a time). Failed requests are not retried.
+ - a concurrent pipeline, to size a parallel runner (such as service.py) under candidate settings: each ASR engine has
+   its own FIFO queue of requests, at most `concurrency` requests in flight, starts at most `rate_limit` requests per
+   second, and retries failed requests after an exponential backoff.
+
+Usage: set the [simulation] section of settings.ini, then run: python simulate.py
+'''
+
+import configparser
+import heapq
+import itertools
+import codecs
+import json
+import random
+import time
+
+import utils
+
+
+def load_records(data_folders, asr_systems, settings):
+    '''
+    Returns a dictionary mapping each ASR engine to the list of its recorded transcriptions.
+    Each recorded transcription is the list of its requests, as (latency_in_seconds, failed) tuples:
+    one request, or one per chunk for segmented speech files.
+    '''
+    records = {asr_system: [] for asr_system in asr_systems}
+    for data_folder in data_folders:
+        for json_filepath in sorted(utils.get_all_filepaths(data_folder, 'json')):
+            for asr_system in asr_systems:
+                if not json_filepath.endswith('_' + asr_system + '.json'): continue
+                results = json.load(codecs.open(json_filepath, 'r', settings.get('general','predicted_transcription_encoding')))
+                if 'chunks' in results:
+                    requests = [(chunk['asr_time_elapsed'], chunk.get('asr_could_not_be_reached', False)) for chunk in results['chunks']]
+                else:
+                    requests = [(results['asr_time_elapsed'], results.get('asr_could_not_be_reached', False))]
+                records[asr_system].append(requests)
+    return records
+
+
+class EngineModel(object):
+    '''
+    Empirical latency and error distributions of one ASR engine.
+    '''
+
+    def __init__(self, records):
+        self.records = records
+        self.requests = [request for requests in records for request in requests]
+        self.error_rate = sum(1 for latency, failed in self.requests if failed) / max(len(self.requests), 1)
+
+    def sample_transcription(self, random_generator):
+        '''
+        Returns the number of requests of a random speech file.
+        '''
+        return len(random_generator.choice(self.records))
+
+    def sample_recorded_transcription(self, random_generator):
+        '''
+        Returns the requests of a random recorded transcription, as (latency_in_seconds, failed) tuples.
+        '''
+        return random_generator.choice(self.records)
+
+    def sample_request(self, random_generator):
+        '''
+        Returns the latency in seconds and the failure status of a random request.
+        '''
+        return random_generator.choice(self.requests)
+
+    def get_latency_percentile(self, latency_percentile):
+        return percentile([latency for latency, failed in self.requests], latency_percentile)
+
+
+def percentile(values, percentile_rank):
+    if len(values) == 0: return 0
+    values = sorted(values)
+    return values[min(int(percentile_rank / 100 * len(values)), len(values) - 1)]
+
+
+def simulate_sequential(engine_models, number_of_files, delay_in_seconds_between_transcriptions, max_parallel_chunks, seed=0):
+    '''
+    Replay number_of_files speech files through the loop of benchmark.py: each speech file is sent to every ASR engine
+    of engine_models one after the other, then benchmark.py waits delay_in_seconds_between_transcriptions seconds.
+    The requests of a segmented speech file are sent at most max_parallel_chunks at a time, in order.
+
+    Returns the predicted wall time of the run, and a dictionary mapping each ASR engine to the time spent waiting for it (in seconds).
+    '''
+    random_generator = random.Random(seed)
+    time_per_asr_system = {asr_system: 0 for asr_system in engine_models}
+    for file_number in range(number_of_files):
+        for asr_system in sorted(engine_models):
+            requests = engine_models[asr_system].sample_recorded_transcription(random_generator)
+            # Each chunk starts as soon as one of the max_parallel_chunks threads is free
+            threads = [0] * min(max_parallel_chunks, len(requests))
+            for latency, failed in requests:
+                heapq.heappush(threads, heapq.heappop(threads) + latency)
+            time_per_asr_system[asr_system] += max(threads + [0])
+    wall_time = sum(time_per_asr_system.values()) + number_of_files * delay_in_seconds_between_transcriptions
+    return wall_time, time_per_asr_system
+
+
+def simulate(engine_models, number_of_files, concurrency, rate_limit, max_retries, retry_backoff_in_seconds, seed=0):
+    '''
+    Replay number_of_files speech files through every ASR engine of engine_models (dictionary mapping each ASR engine
+    to its EngineModel). All the speech files are queued at time 0. rate_limit is in requests per second (0 = no limit).
+    A failed request is retried at most max_retries times, after retry_backoff_in_seconds * 2 ** (attempt - 1) seconds.
+
+    Returns a dictionary mapping each ASR engine to its predicted makespan, throughput and queueing delays (in seconds).
+    '''
+    random_generator = random.Random(seed)
+    events = []
+    event_counter = itertools.count()   # tie-breaker so that events at the same time are processed in order
+
+    def schedule(event_time, event_type, asr_system, request=None):
+        heapq.heappush(events, (event_time, next(event_counter), event_type, asr_system, request))
+
+    engines = {}
+    for asr_system, engine_model in engine_models.items():
+        engine = {'queue': [], 'in_flight': 0, 'next_start': 0, 'dispatch_scheduled': False,
+                  'remaining_requests': {}, 'queueing_delays': [], 'file_completion_times': [],
+                  'number_of_requests': 0, 'number_of_retries': 0, 'failed_files': set()}
+        for file_number in range(number_of_files):
+            number_of_requests = engine_model.sample_transcription(random_generator)
+            engine['remaining_requests'][file_number] = number_of_requests
+            for _ in range(number_of_requests):
+                # request: [file_number, attempt, time at which it was queued]
+                engine['queue'].append([file_number, 1, 0])
+        engine['queue'].reverse()   # popped from the end: FIFO
+        engines[asr_system] = engine
+        schedule(0, 'dispatch', asr_system)
+
+    def dispatch(now, asr_system):
+        engine = engines[asr_system]
+        while engine['queue'] and engine['in_flight'] < concurrency:
+            if rate_limit > 0 and now < engine['next_start']:
+                if not engine['dispatch_scheduled']:
+                    engine['dispatch_scheduled'] = True
+                    schedule(engine['next_start'], 'dispatch', asr_system)
+                return
+            request = engine['queue'].pop()
+            engine['queueing_delays'].append(now - request[2])
+            engine['in_flight'] += 1
+            engine['number_of_requests'] += 1
+            if rate_limit > 0:
+                engine['next_start'] = now + 1 / rate_limit
+            latency, failed = engine_models[asr_system].sample_request(random_generator)
+            request.append(failed)
+            schedule(now + latency, 'completed', asr_system, request)
+
+    while events:
+        now, _, event_type, asr_system, request = heapq.heappop(events)
+        engine = engines[asr_system]
+        if event_type == 'dispatch':
+            engine['dispatch_scheduled'] = False
+        elif event_type == 'retry':
+            request[2] = now
+            engine['queue'].insert(0, request)
+        elif event_type == 'completed':
+            engine['in_flight'] -= 1
+            file_number, attempt, queued_time, failed = request
+            if failed and attempt <= max_retries:
+                engine['number_of_retries'] += 1
+                schedule(now + retry_backoff_in_seconds * 2 ** (attempt - 1), 'retry', asr_system, [file_number, attempt + 1, None])
+            else:
+                if failed: engine['failed_files'].add(file_number)
+                engine['remaining_requests'][file_number] -= 1
+                if engine['remaining_requests'][file_number] == 0:
+                    engine['file_completion_times'].append(now)
+        dispatch(now, asr_system)
+
+    predictions = {}
+    for asr_system, engine in engines.items():
+        makespan = max(engine['file_completion_times'] + [0])
+        predictions[asr_system] = {
+            'makespan': makespan,
+            'throughput': len(engine['file_completion_times']) / makespan if makespan > 0 else 0,
+            'mean_queueing_delay': sum(engine['queueing_delays']) / max(len(engine['queueing_delays']), 1),
+            'p95_queueing_delay': percentile(engine['queueing_delays'], 95),
+            'number_of_requests': engine['number_of_requests'],
+            'number_of_retries': engine['number_of_retries'],
+            'number_of_failed_files': len(engine['failed_files'])}
+    return predictions
+
+
+def main():
+
+    # Load setting file
+    settings = configparser.ConfigParser()
+    settings_filepath = 'settings.ini'
+    settings.read(settings_filepath)
+
+    asr_systems = settings.get('general','asr_systems').split(',')
+    data_folders = settings.get('general','data_folders').split(',')
+    print('asr_systems: {0}'.format(asr_systems))
+    print('data_folders: {0}'.format(data_folders))
+
+    records = load_records(data_folders, asr_systems, settings)
+    engine_models = {}
+    for asr_system in asr_systems:
+        if len(records[asr_system]) == 0:
+            print('No `_{0}.json` file found in data_folders: {0} is not simulated. Run benchmark.py first.'.format(asr_system))
+            continue
+        engine_models[asr_system] = EngineModel(records[asr_system])
+        print('{0}\trecorded transcriptions: {1}\t; requests: {2}\t; error rate: {3:.2f}%\t; median latency: {4:.3f} s\t; p95 latency: {5:.3f} s'.format(
+              asr_system, len(records[asr_system]), len(engine_models[asr_system].requests), engine_models[asr_system].error_rate*100,
+              engine_models[asr_system].get_latency_percentile(50), engine_models[asr_system].get_latency_percentile(95)))
+    if len(engine_models) == 0: return
+
+    number_of_files = settings.getint('simulation','number_of_files')
+    if number_of_files <= 0:
+        number_of_files = max(len(records[asr_system]) for asr_system in engine_models)
+
+    print('\n### Predicted wall time for {0} speech files'.format(number_of_files))
+    delay_in_seconds_between_transcriptions = settings.getint('general','delay_in_seconds_between_transcriptions')
+    max_parallel_chunks = settings.getint('segmentation','max_parallel_chunks')
+    wall_time, time_per_asr_system = simulate_sequential(engine_models, number_of_files, delay_in_seconds_between_transcriptions,
+                                                         max_parallel_chunks, settings.getint('simulation','seed'))
+    print('\nbenchmark.py (one speech file and one ASR engine at a time, delay between speech files: {0} s, max parallel chunks: {1})'.format(
+          delay_in_seconds_between_transcriptions, max_parallel_chunks))
+    for asr_system, time_elapsed in sorted(time_per_asr_system.items()):
+        print('{0}\ttime: {1:.1f} s'.format(asr_system, time_elapsed))
+    print('all\twall time: {0:.1f} s'.format(wall_time))
+
+    print('\n### Predicted wall time for {0} speech files with a concurrent pipeline'.format(number_of_files))
+    candidates = itertools.product([int(value) for value in settings.get('simulation','concurrency').split(',')],
+                                   [float(value) for value in settings.get('simulation','rate_limit_in_requests_per_second').split(',')],
+                                   [int(value) for value in settings.get('simulation','max_retries').split(',')],
+                                   [float(value) for value in settings.get('simulation','retry_backoff_in_seconds').split(',')])
+    for concurrency, rate_limit, max_retries, retry_backoff_in_seconds in candidates:
+        cpu_time_started = time.process_time()
+        predictions = simulate(engine_models, number_of_files, concurrency, rate_limit, max_retries, retry_backoff_in_seconds,
+                               settings.getint('simulation','seed'))
+        cpu_time_elapsed = time.process_time() - cpu_time_started
+        print('\nconcurrency: {0}\t; rate limit: {1}\t; max retries: {2}\t; retry backoff: {3} s\t(simulated in {4:.3f} seconds of CPU time)'.format(
+              concurrency, '{0} requests/s'.format(rate_limit) if rate_limit > 0 else 'none', max_retries, retry_backoff_in_seconds, cpu_time_elapsed))
+        for asr_system, prediction in predictions.items():
+            print('{0}\tmakespan: {1:.1f} s\t; throughput: {2:.3f} files/s\t; queueing delay: {3:.1f} s (mean), {4:.1f} s (p95)\t; retries: {5}\t; failed files: {6}'.format(
+                  asr_system, prediction['makespan'], prediction['throughput'], prediction['mean_queueing_delay'],
+                  prediction['p95_queueing_delay'], prediction['number_of_retries'], prediction['number_of_failed_files']))
+        # The ASR engines are queried in parallel, so the corpus is done when the slowest ASR engine is done.
+        print('all\tmakespan: {0:.1f} s'.format(max(prediction['makespan'] for prediction in predictions.values())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+'''
+Live throughput and progress metrics of the benchmark, per ASR engine:
+ - number of transcriptions completed, skipped and failed,
+ - number of requests in flight,
+ - bytes of decoded PCM audio sent to the ASR APIs (before the FLAC/WAV encoding done by the API clients),
+ - histogram of the request latencies,
+ - transcriptions per second and estimated time remaining.
+
+The metrics are exposed in the Prometheus text format, written periodically to a file (e.g. for the
+node_exporter textfile collector) and/or served on a local HTTP endpoint (http://localhost:<port>/metrics).
+'''
+
+import os
+import threading
+import time
+
+LATENCY_BUCKETS_IN_SECONDS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+TRANSCRIPTION_STATUSES = ['completed', 'skipped', 'failed']
+
+
+class Telemetry(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timestamp_started = time.time()
+        self.number_of_planned_transcriptions = 0
+        self.transcriptions = {}        # (asr_system, status) -> count
+        self.requests_in_flight = {}    # asr_system -> count
+        self.pcm_bytes = {}             # asr_system -> bytes
+        self.latency_buckets = {}       # asr_system -> count per bucket of LATENCY_BUCKETS_IN_SECONDS
+        self.latency_sum = {}           # asr_system -> seconds
+        self.latency_count = {}         # asr_system -> count
+
+    def add_planned_transcriptions(self, number_of_transcriptions):
+        '''
+        Used to compute the estimated time remaining.
+        '''
+        with self.lock:
+            self.number_of_planned_transcriptions += number_of_transcriptions
+
+    def record_transcription(self, asr_system, status):
+        with self.lock:
+            self.transcriptions[(asr_system, status)] = self.transcriptions.get((asr_system, status), 0) + 1
+
+    def request_started(self, asr_system, number_of_bytes):
+        with self.lock:
+            self.requests_in_flight[asr_system] = self.requests_in_flight.get(asr_system, 0) + 1
+            self.pcm_bytes[asr_system] = self.pcm_bytes.get(asr_system, 0) + number_of_bytes
+
+    def request_ended(self, asr_system, latency_in_seconds):
+        with self.lock:
+            self.requests_in_flight[asr_system] -= 1
+            if asr_system not in self.latency_buckets:
+                self.latency_buckets[asr_system] = [0] * len(LATENCY_BUCKETS_IN_SECONDS)
+                self.latency_sum[asr_system] = 0
+                self.latency_count[asr_system] = 0
+            for bucket_number, bucket in enumerate(LATENCY_BUCKETS_IN_SECONDS):
+                if latency_in_seconds <= bucket:
+                    self.latency_buckets[asr_system][bucket_number] += 1
+            self.latency_sum[asr_system] += latency_in_seconds
+            self.latency_count[asr_system] += 1
+
+    def render(self):
+        '''
+        Returns the metrics in the Prometheus text exposition format.
+        '''
+        with self.lock:
+            lines = []
+            lines.append('# HELP asr_benchmark_transcriptions_total Transcriptions of speech files, by ASR engine and status.')
+            lines.append('# TYPE asr_benchmark_transcriptions_total counter')
+            for (asr_system, status), count in sorted(self.transcriptions.items()):
+                lines.append('asr_benchmark_transcriptions_total{{asr_system="{0}",status="{1}"}} {2}'.format(asr_system, status, count))
+
+            lines.append('# HELP asr_benchmark_requests_in_flight Requests currently sent to the ASR engine.')
+            lines.append('# TYPE asr_benchmark_requests_in_flight gauge')
+            for asr_system, count in sorted(self.requests_in_flight.items()):
+                lines.append('asr_benchmark_requests_in_flight{{asr_system="{0}"}} {1}'.format(asr_system, count))
+
+            lines.append('# HELP asr_benchmark_pcm_bytes_total Bytes of decoded PCM audio sent to the ASR engine, before the FLAC/WAV encoding of the request.')
+            lines.append('# TYPE asr_benchmark_pcm_bytes_total counter')
+            for asr_system, number_of_bytes in sorted(self.pcm_bytes.items()):
+                lines.append('asr_benchmark_pcm_bytes_total{{asr_system="{0}"}} {1}'.format(asr_system, number_of_bytes))
+
+            lines.append('# HELP asr_benchmark_request_duration_seconds Latency of the requests to the ASR engine.')
+            lines.append('# TYPE asr_benchmark_request_duration_seconds histogram')
+            for asr_system in sorted(self.latency_buckets):
+                for bucket, count in zip(LATENCY_BUCKETS_IN_SECONDS, self.latency_buckets[asr_system]):
+                    lines.append('asr_benchmark_request_duration_seconds_bucket{{asr_system="{0}",le="{1}"}} {2}'.format(asr_system, bucket, count))
+                lines.append('asr_benchmark_request_duration_seconds_bucket{{asr_system="{0}",le="+Inf"}} {1}'.format(asr_system, self.latency_count[asr_system]))
+                lines.append('asr_benchmark_request_duration_seconds_sum{{asr_system="{0}"}} {1}'.format(asr_system, self.latency_sum[asr_system]))
+                lines.append('asr_benchmark_request_duration_seconds_count{{asr_system="{0}"}} {1}'.format(asr_system, self.latency_count[asr_system]))
+
+            number_of_done_transcriptions = sum(self.transcriptions.values())
+            elapsed_time = time.time() - self.timestamp_started
+            transcriptions_per_second = number_of_done_transcriptions / elapsed_time if elapsed_time > 0 else 0
+            lines.append('# HELP asr_benchmark_planned_transcriptions Transcriptions planned for the run.')
+            lines.append('# TYPE asr_benchmark_planned_transcriptions gauge')
+            lines.append('asr_benchmark_planned_transcriptions {0}'.format(self.number_of_planned_transcriptions))
+            lines.append('# HELP asr_benchmark_transcriptions_per_second Transcriptions done per second since the start of the run.')
+            lines.append('# TYPE asr_benchmark_transcriptions_per_second gauge')
+            lines.append('asr_benchmark_transcriptions_per_second {0}'.format(transcriptions_per_second))
+            if transcriptions_per_second > 0:
+                number_of_remaining_transcriptions = max(self.number_of_planned_transcriptions - number_of_done_transcriptions, 0)
+                lines.append('# HELP asr_benchmark_eta_seconds Estimated time remaining before all the planned transcriptions are done.')
+                lines.append('# TYPE asr_benchmark_eta_seconds gauge')
+                lines.append('asr_benchmark_eta_seconds {0}'.format(number_of_remaining_transcriptions / transcriptions_per_second))
+            return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, textfile_filepath):
+        '''
+        Atomically write the metrics to textfile_filepath.
+        '''
+        temporary_textfile_filepath = textfile_filepath + '.tmp'
+        with open(temporary_textfile_filepath, 'w') as textfile:
+            textfile.write(self.render())
+        os.replace(temporary_textfile_filepath, textfile_filepath)
+
+
+default_telemetry = Telemetry()
+
+
+def start_exporters(settings, telemetry=default_telemetry):
+    '''
+    Start the background exporters configured in the [telemetry] section of settings.
+    Returns a function that stops them and writes the metrics file one last time.
+    '''
+    stop_event = threading.Event()
+    textfile_filepath = settings.get('telemetry','prometheus_textfile')
+    update_interval = settings.getfloat('telemetry','textfile_update_interval_in_seconds')
+    http_port = settings.getint('telemetry','http_port')
+
+    if textfile_filepath != '':
+        def write_textfile_periodically():
+            while not stop_event.wait(update_interval):
+                telemetry.write_textfile(textfile_filepath)
+        threading.Thread(target=write_textfile_periodically, daemon=True).start()
+
+    http_server = None
+    if http_port > 0:
+        # Only imported when the HTTP endpoint is enabled
+        import http.server
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # don't print a line for each scrape
+
+        http_server = http.server.HTTPServer(('localhost', http_port), MetricsHandler)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        print('Metrics available on http://localhost:{0}/metrics'.format(http_port))
+
+    def stop():
+        stop_event.set()
+        if textfile_filepath != '':
+            telemetry.write_textfile(textfile_filepath)
+        if http_server is not None:
+            http_server.shutdown()
+            http_server.server_close()
+    return stop
@@ -1,221 +1,69 @@
 #!/usr/bin/env python3
 
-import speech_recognition as sr
 from os import path
 import time
 import json
 import os
 import sys
-import asr_speechmatics
 import codecs
+import concurrent.futures
+import engines
+import pcm_cache
+import telemetry
+import utils
 
-def transcribe(speech_filepath, asr_system, settings, save_transcription=True):
+def transcribe(speech_filepath, asr_system, settings, save_transcription=True, audio=None, variant='clean', variant_operations=None):
     '''
+    audio is the decoded audio of speech_filepath (sr.AudioData instance), if it was already loaded with load_audio().
+    variant is the name of the variant of the audio sent to the ASR API (see augmentation.py). The transcriptions of the
+    variants other than clean are saved with the name of the variant appended, e.g. hello_google_snr10.txt
+    variant_operations are the operations applied to audio to get the variant (see augmentation.get_variants());
+    by default, the ones of variant in settings. Use [] if audio is already the variant.
+
     Returns:
      - transcription: string corresponding the transcription obtained from the ASR API or existing transcription file.
      - transcription_skipped: Boolean indicating if the speech file was sent to the ASR API.
     '''
-    transcription_json = ''
-    transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + asr_system
+    transcription_filepath_base = get_transcription_filepath_base(speech_filepath, asr_system, variant)
     transcription_filepath_text = transcription_filepath_base  + '.txt'
     transcription_filepath_json = transcription_filepath_base  + '.json'
 
     # If there already exists a transcription file,  we may skip it depending on the user settings.  
-    if asr_system != 'deepspeech': # always redo deepspeech files
-        if os.path.isfile(transcription_filepath_text):
-            existing_transcription = codecs.open(transcription_filepath_text, 'r', settings.get('general','predicted_transcription_encoding')).read()
-            is_transcription_file_empty = len(existing_transcription.strip()) == 0
-            if not is_transcription_file_empty and not settings.getboolean('general','overwrite_non_empty_transcriptions'):
-                #print('Skipped speech file {0} because the file {1} already exists and is not empty.'.format(speech_filepath,transcription_filepath_text))
-                #print('Change the setting `overwrite_non_empty_transcriptions` to True if you want to overwrite existing transcriptions')
-                transcription_skipped = True
-                return existing_transcription, transcription_skipped
-            if is_transcription_file_empty and not settings.getboolean('general','overwrite_empty_transcriptions'):
-                print('Skipped speech file {0} because the file {1} already exists and is empty.'.format(speech_filepath,transcription_filepath_text))
-                print('Change the setting `overwrite_empty_transcriptions` to True if you want to overwrite existing transcriptions')
-                transcription_skipped = True
-                return existing_transcription, transcription_skipped
+    existing_transcription = get_existing_transcription(speech_filepath, asr_system, settings, variant)
+    if existing_transcription is not None:
+        transcription_skipped = True
+        telemetry.default_telemetry.record_transcription(asr_system, 'skipped')
+        return existing_transcription, transcription_skipped
+
+    # speech_recognition is only imported when some speech file is actually transcribed
+    import speech_recognition as sr
 
     # use the audio file as the audio source
     r = sr.Recognizer()
-    with sr.AudioFile(speech_filepath) as source:
-        audio = r.record(source)  # read the entire audio file
-
-    transcription = ''
-    asr_could_not_be_reached = False
+    if audio is None:
+        audio = load_audio(speech_filepath, settings)
+    if variant != 'clean':
+        import augmentation
+        if variant_operations is None:
+            variant_operations = dict(augmentation.get_variants(settings))[variant]
+        audio = augmentation.augment(audio, variant_operations,
+                                     augmentation.get_seed(settings.getint('augmentation','seed'), variant, speech_filepath))
+
+    # Import the plugin of the ASR engine before the timer starts, so that the first request isn't slower
+    engines.get_engine(asr_system)
     asr_timestamp_started = time.time()
-    speech_language = settings.get('general','speech_language')
-    if asr_system == 'google':
-        # recognize speech using Google Speech Recognition
-        try:
-            # for testing purposes, we're just using the default API key
-            # to use another API key, use `r.recognize_google(audio, key="GOOGLE_SPEECH_RECOGNITION_API_KEY")`
-            # instead of `r.recognize_google(audio)`
-            kwargs = {}
-            google_api_key = "" #settings.get('general','google_api_key')
-            if google_api_key != "" : kwargs['key'] = google_api_key
-            response = r.recognize_google(audio, show_all=True, language=speech_language, **kwargs)
-            transcription_json = response
-
-            actual_result = response
-            if not isinstance(actual_result, dict) or len(actual_result.get("alternative", [])) == 0: raise sr.UnknownValueError()
-
-            if "confidence" in actual_result["alternative"]:
-                # return alternative with highest confidence score
-                best_hypothesis = max(actual_result["alternative"], key=lambda alternative: alternative["confidence"])
-            else:
-                # when there is no confidence available, we arbitrarily choose the first hypothesis.
-                best_hypothesis = actual_result["alternative"][0]
-            if "transcript" not in best_hypothesis: raise sr.UnknownValueError()
-            transcription = best_hypothesis["transcript"]
-
-            print("Google Speech Recognition transcription is: " + transcription)
-        except sr.UnknownValueError:
-            print("Google Speech Recognition could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from Google Speech Recognition service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-    elif asr_system == 'googlecloud':
-        # recognize speech using Google Cloud Speech
-        GOOGLE_CLOUD_SPEECH_CREDENTIALS_filepath = settings.get('credentials','google_cloud_speech_credentials_filepath')
-        GOOGLE_CLOUD_SPEECH_CREDENTIALS = codecs.open(GOOGLE_CLOUD_SPEECH_CREDENTIALS_filepath, 'r', 'UTF-8').read()
-        try:
-            response = r.recognize_google_cloud(audio, credentials_json=GOOGLE_CLOUD_SPEECH_CREDENTIALS, show_all=True, language=speech_language)
-            transcription_json = response
-            if "results" not in response or len(response["results"]) == 0: raise sr.UnknownValueError()
-            transcript = ""
-            for result in response["results"]:
-                transcript += result["alternatives"][0]["transcript"].strip() + " "
-
-            transcription = transcript
-
-        except sr.UnknownValueError:
-            print("Google Cloud Speech could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from Google Cloud Speech service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-    # recognize speech using Wit.ai
-    elif asr_system == 'wit':
-        WIT_AI_KEY = settings.get('credentials','wit_ai_key')
-        print("Calling the Wit.ai API")
-        try:
-            response = r.recognize_wit(audio, key=WIT_AI_KEY, show_all=True)
-            transcription_json = response
-
-            if "_text" not in response or response["_text"] is None: raise sr.UnknownValueError()
-            transcription = response["_text"]
-
-        except sr.UnknownValueError:
-            print("Wit.ai could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from Wit.ai service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-    # recognize speech using Microsoft Bing Voice Recognition
-    elif asr_system == 'microsoft':
-        BING_KEY = settings.get('credentials','bing_key')
-        print('Calling the Microsoft Bing Voice Recognition API')
-        try:
-            response =  r.recognize_bing(audio, key=BING_KEY, show_all=True, language=speech_language)
-            transcription_json = response
-            if "RecognitionStatus" not in response or response["RecognitionStatus"] != "Success" or "DisplayText" not in response:
-                raise sr.UnknownValueError()
-            transcription = response["DisplayText"]
-
-        except sr.UnknownValueError:
-            print("Microsoft Bing Voice Recognition could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from Microsoft Bing Voice Recognition service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-
-    elif asr_system == 'houndify':
-        # recognize speech using Houndify
-        HOUNDIFY_CLIENT_ID = settings.get('credentials','houndify_client_id')
-        HOUNDIFY_CLIENT_KEY = settings.get('credentials','houndify_client_key')
-
-        print("Calling the Houndify API")
-        try:
-            response = r.recognize_houndify(audio, client_id=HOUNDIFY_CLIENT_ID, client_key=HOUNDIFY_CLIENT_KEY, show_all=True)
-            transcription_json = response
-
-            if "Disambiguation" not in response or response["Disambiguation"] is None:
-                raise sr.UnknownValueError()
-
-            transcription = response['Disambiguation']['ChoiceData'][0]['Transcription']
-
-
-        except sr.UnknownValueError:
-            print("Houndify could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from Houndify service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-    # recognize speech using IBM Speech to Text
-    elif asr_system == 'ibm':
-        IBM_USERNAME = settings.get('credentials','ibm_username')
-        IBM_PASSWORD = settings.get('credentials','ibm_password')
-        try:
-            response = r.recognize_ibm(audio, username=IBM_USERNAME, password=IBM_PASSWORD, show_all=True, language=speech_language)
-            transcription_json = response
-
-            if "results" not in response or len(response["results"]) < 1 or "alternatives" not in response["results"][0]:
-                raise sr.UnknownValueError()
-
-            transcription = []
-            for utterance in response["results"]:
-                if "alternatives" not in utterance: raise sr.UnknownValueError()
-                for hypothesis in utterance["alternatives"]:
-                    if "transcript" in hypothesis:
-                        transcription.append(hypothesis["transcript"])
-            transcription = "\n".join(transcription)
-            transcription = transcription.strip()
-
-        except sr.UnknownValueError:
-            print("IBM Speech to Text could not understand audio")
-        except sr.RequestError as e:
-            print("Could not request results from IBM Speech to Text service; {0}".format(e))
-            asr_could_not_be_reached = True
-
-    elif asr_system == 'speechmatics':
-        # recognize speech using Speechmatics Speech Recognition
-        speechmatics_id = settings.get('credentials','speechmatics_id')
-        speechmatics_token = settings.get('credentials','speechmatics_token')
-        print('speech_filepath: {0}'.format(speech_filepath))
-        transcription, transcription_json = asr_speechmatics.transcribe_speechmatics(speechmatics_id,speechmatics_token,speech_filepath,speech_language)
-        try:
-            print('Speechmatics  transcription is: {0}'.format(transcription))
-        except:
-            print('Speechmatics encountered some issue')
-            asr_could_not_be_reached = True
-
-    elif asr_system == 'amazon':
-        try:
-            bot_name = settings.get('credentials','amazon_bot_name')
-            bot_alias = settings.get('credentials','amazon_bot_alias')
-            user_id = settings.get('credentials','amazon_user_id')
-            transcription,transcription_json = recognize_amazon(audio, bot_name, bot_alias, user_id,
-                     content_type="audio/l16; rate=16000; channels=1", access_key_id=settings.get('credentials','amazon_access_key_id'),
-                     secret_access_key=settings.get('credentials','amazon_secret_access_key'), region=settings.get('credentials','amazon_region'))
-            transcription_json['audioStream'] = ''
-        except sr.UnknownValueError:
-            print("Amazon not process the speech transcription request")
-
-    elif asr_system == 'deepspeech':
-        try:
-            deepspeech_cmdline = settings.get('deepspeech','cmdline')
-            transcription,transcription_json = recognize_deepspeech(audio, deepspeech_cmdline)
-        except:
-            print('Deepspeech encountered some issue')
-            asr_could_not_be_reached = True
-            
-    else: raise ValueError("Invalid asr_system. asr_system = {0}".format(asr_system))
+    try:
+        # The ASR APIs that require a file to be uploaded must get the augmented audio, not the original speech file
+        transcription, transcription_json, asr_could_not_be_reached, chunk_results = send_to_asr(r, audio, speech_filepath if variant == 'clean' else None,
+                                                                                                 asr_system, settings)
+    except:
+        telemetry.default_telemetry.record_transcription(asr_system, 'failed')
+        raise
+    telemetry.default_telemetry.record_transcription(asr_system, 'failed' if asr_could_not_be_reached else 'completed')
 
     asr_timestamp_ended = time.time()
     asr_time_elapsed = asr_timestamp_ended - asr_timestamp_started
-    print('asr_time_elapsed: {0:.3f} seconds'.format(asr_time_elapsed))
+    utils.log('asr_time_elapsed: {0:.3f} seconds'.format(asr_time_elapsed))
     #time.sleep(2)   # Delay in seconds
     #if len(transcription) == 0 and asr_could_not_be_reached: return transcription
 
@@ -223,13 +71,16 @@ def transcribe(speech_filepath, asr_system, settings, save_transcription=True):
         #print('Transcription saved in {0} and {1}'.format(transcription_filepath_text,transcription_filepath_json))
         codecs.open(transcription_filepath_text,'w', settings.get('general','predicted_transcription_encoding')).write(transcription)
 
-    print('transcription: {0}'.format(transcription))
+    utils.log('transcription: {0}'.format(transcription))
     results = {}
     results['transcription'] = transcription
     results['transcription_json'] = transcription_json
     results['asr_time_elapsed'] = asr_time_elapsed
     results['asr_timestamp_ended'] = asr_timestamp_ended
     results['asr_timestamp_started'] = asr_timestamp_started
+    results['asr_could_not_be_reached'] = asr_could_not_be_reached
+    if chunk_results is not None:
+        results['chunks'] = chunk_results
 
 
     json.dump(results, codecs.open(transcription_filepath_json, 'w', settings.get('general','predicted_transcription_encoding')), indent = 4, sort_keys=True)
@@ -238,74 +89,165 @@ def transcribe(speech_filepath, asr_system, settings, save_transcription=True):
     return transcription, transcription_skipped
 
 
+def get_transcription_filepath_base(speech_filepath, asr_system, variant='clean'):
+    '''
+    Path of the transcription files of speech_filepath by asr_system, without extension, e.g. hello_google or hello_google_snr10
+    '''
+    transcription_filepath_base = '.'.join(speech_filepath.split('.')[:-1]) + '_'  + asr_system
+    if variant != 'clean':
+        transcription_filepath_base += '_' + variant
+    return transcription_filepath_base
 
-def recognize_amazon(audio_data, bot_name, bot_alias, user_id,
-                     content_type="audio/l16; rate=16000; channels=1", access_key_id=None, secret_access_key=None, region=None):
-    """
-    Performs speech recognition on ``audio_data`` (an ``AudioData`` instance).
-
-    If access_key_id or secret_access_key is not set it will go through the list in the link below
-    http://boto3.readthedocs.io/en/latest/guide/configuration.html#configuring-credentials
-
-    Author: Patrick Artounian (https://github.com/partounian)
-    Source: https://github.com/Uberi/speech_recognition/pull/331
-    """
-    assert isinstance(audio_data, sr.AudioData), "Data must be audio data"
-    assert isinstance(bot_name, str), "``bot_name`` must be a string"
-    assert isinstance(bot_alias, str), "``bot_alias`` must be a string"
-    assert isinstance(user_id, str), "``user_id`` must be a string"
-    assert isinstance(content_type, str), "``content_type`` must be a string"
-    assert access_key_id is None or isinstance(access_key_id, str), "``access_key_id`` must be a string"
-    assert secret_access_key is None or isinstance(secret_access_key, str), "``secret_access_key`` must be a string"
-    assert region is None or isinstance(region, str), "``region`` must be a string"
-
-    try:
-        import boto3
-    except ImportError:
-        raise sr.RequestError("missing boto3 module: ensure that boto3 is set up correctly.")
 
-    client = boto3.client('lex-runtime', aws_access_key_id=access_key_id,
-                          aws_secret_access_key=secret_access_key,
-                          region_name=region)
+def get_existing_transcription(speech_filepath, asr_system, settings, variant='clean'):
+    '''
+    Returns the content of the existing transcription file of speech_filepath by asr_system if, according to the settings
+    overwrite_non_empty_transcriptions and overwrite_empty_transcriptions, the speech file should not be transcribed again,
+    and None otherwise.
+    '''
+    if asr_system == 'deepspeech': return None # always redo deepspeech files
+    transcription_filepath_text = get_transcription_filepath_base(speech_filepath, asr_system, variant) + '.txt'
+    if not os.path.isfile(transcription_filepath_text): return None
+    existing_transcription = codecs.open(transcription_filepath_text, 'r', settings.get('general','predicted_transcription_encoding')).read()
+    is_transcription_file_empty = len(existing_transcription.strip()) == 0
+    if not is_transcription_file_empty and not settings.getboolean('general','overwrite_non_empty_transcriptions'):
+        #print('Skipped speech file {0} because the file {1} already exists and is not empty.'.format(speech_filepath,transcription_filepath_text))
+        #print('Change the setting `overwrite_non_empty_transcriptions` to True if you want to overwrite existing transcriptions')
+        return existing_transcription
+    if is_transcription_file_empty and not settings.getboolean('general','overwrite_empty_transcriptions'):
+        utils.log('Skipped speech file {0} because the file {1} already exists and is empty.'.format(speech_filepath,transcription_filepath_text))
+        utils.log('Change the setting `overwrite_empty_transcriptions` to True if you want to overwrite existing transcriptions')
+        return existing_transcription
+    return None
+
+
+def send_to_asr(r, audio, speech_filepath, asr_system, settings):
+    '''
+    Send the audio of speech_filepath to the ASR API asr_system, either in one request or, if it is long enough
+    and segmentation is enabled, as chunks sent in parallel.
 
-    raw_data = audio_data.get_raw_data(
-        convert_rate=16000, convert_width=2
-    )
+    Returns transcription, transcription_json, asr_could_not_be_reached, and chunk_results
+    (see transcribe_chunks(); None if the speech file wasn't segmented).
+    If the speech file was segmented, transcription_json is None: the raw response of each chunk is in chunk_results.
+    '''
+    if settings.getboolean('segmentation','segment_long_speech_files') and \
+            len(audio.frame_data) / (audio.sample_rate * audio.sample_width) > settings.getfloat('segmentation','min_duration_in_seconds_to_segment'):
+        # Split the speech file at silences, and send the chunks to the ASR API in parallel
+        import segmentation
+        chunks = segmentation.split_on_silence(audio,
+                                               silence_threshold_db=settings.getfloat('segmentation','silence_threshold_db'),
+                                               min_silence_duration=settings.getfloat('segmentation','min_silence_duration_in_seconds'),
+                                               min_chunk_duration=settings.getfloat('segmentation','min_chunk_duration_in_seconds'),
+                                               max_chunk_duration=settings.getfloat('segmentation','max_chunk_duration_in_seconds'))
+        utils.log('Speech file {0} split into {1} chunks'.format(speech_filepath, len(chunks)))
+        transcription, chunk_results, asr_could_not_be_reached = transcribe_chunks(chunks, asr_system, settings)
+        transcription_json = None
+    else:
+        chunk_results = None
+        transcription, transcription_json, asr_could_not_be_reached = recognize(r, audio, asr_system, settings, speech_filepath)
+    return transcription, transcription_json, asr_could_not_be_reached, chunk_results
+
+
+_pcm_cache = None
+
+def get_pcm_cache(settings):
+    '''
+    Returns the PCM cache configured in settings, opening it on first use.
+    '''
+    global _pcm_cache
+    if _pcm_cache is None:
+        _pcm_cache = pcm_cache.PcmCache(settings.get('pcm_cache','cache_folder'),
+                                        settings.getint('pcm_cache','max_size_in_megabytes') * 1024 * 1024)
+    return _pcm_cache
 
-    accept = "text/plain; charset=utf-8"
-    response = client.post_content(botName=bot_name, botAlias=bot_alias, userId=user_id,
-                                   contentType=content_type, accept=accept, inputStream=raw_data)
 
-    if not response["inputTranscript"]:
-        raise sr.UnknownValueError()
+def decode_speech_file(speech_filepath):
+    '''
+    Decode speech_filepath into 16 kHz, 16-bit, mono PCM audio (bytes).
+    WAV, AIFF and FLAC files are read with SpeechRecognition, the other formats (e.g. mp3 and ogg) with pydub.
+    '''
+    import speech_recognition as sr
+    speech_file_type = speech_filepath.split('.')[-1].lower()
+    if speech_file_type in ['wav', 'aiff', 'aif', 'flac']:
+        with sr.AudioFile(speech_filepath) as source:
+            audio = sr.Recognizer().record(source)
+        return audio.get_raw_data(convert_rate=pcm_cache.PCM_SAMPLE_RATE, convert_width=pcm_cache.PCM_SAMPLE_WIDTH)
+    from pydub import AudioSegment
+    sound = AudioSegment.from_file(speech_filepath, format=speech_file_type)
+    sound = sound.set_channels(1).set_frame_rate(pcm_cache.PCM_SAMPLE_RATE).set_sample_width(pcm_cache.PCM_SAMPLE_WIDTH)
+    return sound.raw_data
+
+
+def load_audio(speech_filepath, settings):
+    '''
+    Returns the audio of speech_filepath as an sr.AudioData instance.
 
-    return response["inputTranscript"], response
+    If the PCM cache is enabled, the audio is decoded and resampled to 16 kHz only the first time,
+    and later read from the cache without any copy. Otherwise, the formats that SpeechRecognition can't read
+    (e.g. mp3 and ogg) are decoded in memory with pydub.
+    '''
+    import speech_recognition as sr
+    if not settings.getboolean('pcm_cache','enabled'):
+        if speech_filepath.split('.')[-1].lower() not in ['wav', 'aiff', 'aif', 'flac']:
+            return sr.AudioData(decode_speech_file(speech_filepath), pcm_cache.PCM_SAMPLE_RATE, pcm_cache.PCM_SAMPLE_WIDTH)
+        with sr.AudioFile(speech_filepath) as source:
+            return sr.Recognizer().record(source)  # read the entire audio file
+    cache = get_pcm_cache(settings)
+    pcm_data = cache.get(speech_filepath)
+    if pcm_data is None:
+        pcm_data = cache.put(speech_filepath, decode_speech_file(speech_filepath))
+    return sr.AudioData(pcm_data, pcm_cache.PCM_SAMPLE_RATE, pcm_cache.PCM_SAMPLE_WIDTH)
+
+
+def recognize(r, audio, asr_system, settings, speech_filepath=None):
+    '''
+    Send audio (an sr.AudioData instance) to the ASR API asr_system, through its plugin module (see engines.py).
+    speech_filepath is only used by the ASR APIs that require a file to be uploaded (speechmatics):
+    if it is None, audio is written to a temporary WAV file.
 
+    Returns:
+     - transcription: string corresponding the transcription obtained from the ASR API.
+     - transcription_json: raw response of the ASR API.
+     - asr_could_not_be_reached: Boolean indicating if the ASR API could not be reached.
+    '''
+    engine = engines.get_engine(asr_system)
+    telemetry.default_telemetry.request_started(asr_system, len(audio.frame_data))
+    request_timestamp_started = time.time()
+    try:
+        return engine.recognize(r, audio, settings, speech_filepath)
+    finally:
+        telemetry.default_telemetry.request_ended(asr_system, time.time() - request_timestamp_started)
 
 
-def recognize_deepspeech(audio_data, cmdline):
-    """
-    Author: Misha Jiline (https://github.com/mjiline)
-    """
-    assert isinstance(audio_data, sr.AudioData), "Data must be audio data"
-    assert isinstance(cmdline, str), "``cmdline`` must be a string"
+def transcribe_chunks(chunks, asr_system, settings):
+    '''
+    Send the chunks returned by segmentation.split_on_silence() to the ASR API asr_system in parallel,
+    and stitch the transcriptions of the chunks back together in order.
 
-    try:
-        import tempfile
-        import subprocess
-        from subprocess import PIPE
-    except ImportError:
-        raise sr.RequestError("missing tempfile module")
-
-    raw_data = audio_data.get_wav_data(
-        convert_rate=16000, convert_width=2
-    )
-
-    with tempfile.NamedTemporaryFile(suffix='.wav') as fp:
-        fp.write(raw_data)
-        fp.seek(0)
-        transcript = subprocess.run(
-            "exec %s --audio %s" % (cmdline, fp.name), shell=True, stdout=PIPE, stderr=PIPE).stdout
-        transcript = transcript.decode('utf-8')
-
-    return transcript, {}
+    Returns:
+     - transcription: string corresponding to the concatenated transcriptions of the chunks.
+     - chunk_results: list containing for each chunk its start and end in seconds, its transcription,
+                      the raw response of the ASR API and the timestamps of the request.
+     - asr_could_not_be_reached: Boolean indicating if the ASR API could not be reached for at least one chunk.
+    '''
+    import speech_recognition as sr
+
+    def transcribe_chunk(chunk):
+        chunk_start, chunk_end, chunk_audio = chunk
+        chunk_result = {'start_in_seconds': chunk_start, 'end_in_seconds': chunk_end}
+        chunk_result['asr_timestamp_started'] = time.time()
+        # sr.Recognizer instances are not shared between threads
+        chunk_transcription, chunk_transcription_json, chunk_asr_could_not_be_reached = recognize(sr.Recognizer(), chunk_audio, asr_system, settings)
+        chunk_result['asr_timestamp_ended'] = time.time()
+        chunk_result['asr_time_elapsed'] = chunk_result['asr_timestamp_ended'] - chunk_result['asr_timestamp_started']
+        chunk_result['transcription'] = chunk_transcription.strip()
+        chunk_result['transcription_json'] = chunk_transcription_json
+        chunk_result['asr_could_not_be_reached'] = chunk_asr_could_not_be_reached
+        return chunk_result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=settings.getint('segmentation','max_parallel_chunks')) as executor:
+        chunk_results = list(executor.map(transcribe_chunk, chunks))
+
+    transcription = ' '.join(chunk_result['transcription'] for chunk_result in chunk_results if len(chunk_result['transcription']) > 0)
+    asr_could_not_be_reached = any(chunk_result['asr_could_not_be_reached'] for chunk_result in chunk_results)
+    return transcription, chunk_results, asr_could_not_be_reached
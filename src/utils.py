@@ -1,5 +1,8 @@
 import os
 
+# In quiet mode, the per-file messages are not printed (see the setting `quiet`).
+quiet = False
+
 def create_folder_if_not_exists(directory):
     '''
     Create the folder if it doesn't exist already.
@@ -13,3 +16,11 @@ def get_all_filepaths(path, file_extension):
     [How can I search sub-folders using glob.glob module in Python?](https://stackoverflow.com/a/14798263/395857)
     '''
     return [os.path.join(dirpath, f) for dirpath, dirnames, files in os.walk(path) for f in files if f.endswith('.{0}'.format(file_extension))]
+
+
+def log(message):
+    '''
+    Print a per-file progress message, unless the quiet mode is on.
+    '''
+    if not quiet:
+        print(message)
@@ -0,0 +1,95 @@
+import math
+import random
+
+import adaptive_sampling
+
+
+def test_normal_quantile():
+    assert abs(adaptive_sampling.normal_quantile(0.5)) < 1e-9
+    assert abs(adaptive_sampling.normal_quantile(0.95) - 1.644854) < 1e-6
+    assert abs(adaptive_sampling.normal_quantile(0.975) - 1.959964) < 1e-6
+    assert abs(adaptive_sampling.normal_quantile(0.025) + 1.959964) < 1e-6
+
+
+def test_wer_estimate_is_the_ratio_of_the_sums():
+    estimate = adaptive_sampling.WerEstimate()
+    for number_of_changes, number_of_tokens_in_gold in [(1, 10), (5, 20), (0, 5)]:
+        estimate.update(number_of_changes, number_of_tokens_in_gold)
+    assert estimate.get_wer() == 6 / 35
+
+
+def test_confidence_interval_of_the_ratio_estimator():
+    files = [(1, 10), (5, 20), (0, 5), (3, 12)]
+    estimate = adaptive_sampling.WerEstimate(confidence=0.95)
+    for number_of_changes, number_of_tokens_in_gold in files:
+        estimate.update(number_of_changes, number_of_tokens_in_gold)
+    # Standard error of a ratio estimator: sqrt(sum((changes - wer * tokens)^2) / (n (n-1))) / mean(tokens)
+    wer = 9 / 47
+    n = len(files)
+    standard_error = math.sqrt(sum((changes - wer * tokens) ** 2 for changes, tokens in files) / (n * (n - 1))) / (47 / n)
+    lower_bound, upper_bound = estimate.get_confidence_interval()
+    assert abs(lower_bound - (wer - 1.959964 * standard_error)) < 1e-6
+    assert abs(upper_bound - (wer + 1.959964 * standard_error)) < 1e-6
+
+
+def test_confidence_interval_without_enough_files():
+    estimate = adaptive_sampling.WerEstimate()
+    assert estimate.get_confidence_interval() == (0, math.inf)
+    estimate.update(1, 10)
+    assert estimate.get_confidence_interval() == (0, math.inf)
+
+
+def test_confidence_interval_is_empty_if_all_the_files_have_the_same_wer():
+    estimate = adaptive_sampling.WerEstimate()
+    for number_of_tokens_in_gold in [10, 20, 30]:
+        estimate.update(number_of_tokens_in_gold // 10, number_of_tokens_in_gold)
+    lower_bound, upper_bound = estimate.get_confidence_interval()
+    assert abs(lower_bound - 0.1) < 1e-6 and abs(upper_bound - 0.1) < 1e-6
+
+
+def test_confidence_interval_coverage():
+    # Corpus of 2000 files whose WER varies from file to file: the 95% confidence intervals computed on
+    # random samples of 100 files contain the WER of the whole corpus about 95% of the time
+    random_generator = random.Random(0)
+    corpus = []
+    for _ in range(2000):
+        number_of_tokens_in_gold = random_generator.randint(5, 40)
+        file_wer = random_generator.betavariate(2, 8)
+        corpus.append((sum(random_generator.random() < file_wer for _ in range(number_of_tokens_in_gold)), number_of_tokens_in_gold))
+    corpus_wer = sum(changes for changes, tokens in corpus) / sum(tokens for changes, tokens in corpus)
+    number_of_covering_intervals = 0
+    for _ in range(400):
+        estimate = adaptive_sampling.WerEstimate(confidence=0.95)
+        for number_of_changes, number_of_tokens_in_gold in random_generator.sample(corpus, 100):
+            estimate.update(number_of_changes, number_of_tokens_in_gold)
+        lower_bound, upper_bound = estimate.get_confidence_interval()
+        number_of_covering_intervals += lower_bound <= corpus_wer <= upper_bound
+    assert 0.90 <= number_of_covering_intervals / 400 <= 0.99
+
+
+def test_sampler_stops_once_precise_enough():
+    sampler = adaptive_sampling.AdaptiveSampler(['google'], target_confidence_interval_width=0.02, min_number_of_files=3)
+    sampler.update('google', 1, 10)
+    sampler.update('google', 2, 20)
+    assert sampler.get_active_asr_systems() == ['google']
+    sampler.update('google', 3, 30)
+    assert sampler.get_active_asr_systems() == []
+    assert sampler.stopping_reasons['google'] == 'precise enough'
+
+
+def test_sampler_stops_once_separated_from_the_other_asr_engines():
+    sampler = adaptive_sampling.AdaptiveSampler(['google', 'ibm'], target_confidence_interval_width=0.001, min_number_of_files=2)
+    for number_of_changes, number_of_tokens_in_gold in [(1, 10), (2, 10), (1, 10), (2, 10)]:
+        sampler.update('google', number_of_changes, number_of_tokens_in_gold)
+        sampler.update('ibm', number_of_changes + 5, number_of_tokens_in_gold)
+    assert sampler.get_active_asr_systems() == []
+    assert sampler.stopping_reasons == {'google': 'separated from the other ASR engines', 'ibm': 'separated from the other ASR engines'}
+
+
+def test_stratified_order_keeps_the_proportions_of_the_strata():
+    strata = {'a': ['a{0}'.format(k) for k in range(100)], 'b': ['b{0}'.format(k) for k in range(300)]}
+    order = adaptive_sampling.stratified_order(strata, seed=0)
+    assert sorted(order) == sorted(strata['a'] + strata['b'])
+    for prefix_length in [20, 40, 100]:
+        number_of_a = sum(1 for item in order[:prefix_length] if item.startswith('a'))
+        assert abs(number_of_a - prefix_length / 4) <= 2
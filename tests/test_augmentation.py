@@ -0,0 +1,106 @@
+import configparser
+import math
+import os
+import subprocess
+import sys
+
+import numpy
+import pytest
+
+import augmentation
+
+
+def make_settings(variants):
+    settings = configparser.ConfigParser()
+    settings['augmentation'] = {'variants': variants, 'seed': '0'}
+    return settings
+
+
+def make_sine(sample_rate=16000, duration_in_seconds=1, frequency=440, amplitude=0.5):
+    return amplitude * numpy.sin(2 * math.pi * frequency * numpy.arange(sample_rate * duration_in_seconds) / sample_rate)
+
+
+def power_in_db(samples):
+    return 10 * math.log10(numpy.mean(samples ** 2))
+
+
+def test_get_variants():
+    assert augmentation.get_variants(make_settings('clean')) == [('clean', [])]
+    assert augmentation.get_variants(make_settings('clean, snr10=noise:10, telephone=resample:8000+bandpass:300:3400+mulaw:256,')) == \
+        [('clean', []), ('snr10', [('noise', [10.0])]),
+         ('telephone', [('resample', [8000.0]), ('bandpass', [300.0, 3400.0]), ('mulaw', [256.0])])]
+
+
+@pytest.mark.parametrize('variants', ['noisy', 'snr10=reverb:10', 'snr10=noise:ten', 'snr10=noise', 'low=bandpass:300'])
+def test_get_variants_rejects_invalid_variants(variants):
+    with pytest.raises(ValueError):
+        augmentation.get_variants(make_settings(variants))
+
+
+@pytest.mark.parametrize('snr_db', [0, 10, 20])
+def test_add_noise(snr_db):
+    samples = make_sine()
+    noisy_samples = augmentation.add_noise(samples, 16000, numpy.random.default_rng(0), snr_db)
+    assert power_in_db(samples) - power_in_db(noisy_samples - samples) == pytest.approx(snr_db, abs=0.1)
+
+
+def test_apply_gain():
+    samples = make_sine()
+    assert power_in_db(augmentation.apply_gain(samples, 16000, None, 6)) - power_in_db(samples) == pytest.approx(6)
+    assert power_in_db(augmentation.apply_gain(samples, 16000, None, -20)) - power_in_db(samples) == pytest.approx(-20)
+
+
+@pytest.mark.parametrize('factor', [0.9, 1.1, 2])
+def test_change_speed(factor):
+    assert len(augmentation.change_speed(make_sine(), 16000, None, factor)) == int(16000 / factor)
+
+
+def test_resample_removes_the_frequencies_above_the_nyquist_frequency():
+    samples = make_sine(frequency=440) + make_sine(frequency=6000)
+    resampled_samples = augmentation.resample(samples, 16000, None, 8000)
+    assert len(resampled_samples) == len(samples)
+    assert power_in_db(resampled_samples - make_sine(frequency=440)) < power_in_db(samples) - 20
+    assert augmentation.resample(samples, 16000, None, 16000) is samples
+
+
+def test_band_pass():
+    filtered_samples = augmentation.band_pass(make_sine(frequency=100) + make_sine(frequency=1000), 16000, None, 300, 3400)
+    assert numpy.allclose(filtered_samples, make_sine(frequency=1000))
+
+
+@pytest.mark.parametrize('quantization_levels', [16, 256])
+def test_mu_law(quantization_levels):
+    samples = make_sine(amplitude=1)
+    companded_samples = augmentation.mu_law(samples, 16000, None, quantization_levels)
+    assert len(numpy.unique(companded_samples)) <= quantization_levels
+    assert numpy.max(numpy.abs(companded_samples - samples)) < 8 / quantization_levels
+
+
+def test_augment():
+    import speech_recognition as sr
+    samples = numpy.round(make_sine() * 32767).astype(numpy.int16)
+    audio = sr.AudioData(samples.tobytes(), 16000, 2)
+    assert augmentation.augment(audio, []) is audio
+    operations = [('noise', [10.0]), ('speed', [2.0])]
+    seed = augmentation.get_seed(0, 'snr10', 'folder/hello.wav')
+    augmented_audio = augmentation.augment(audio, operations, seed)
+    assert (augmented_audio.sample_rate, augmented_audio.sample_width) == (16000, 2)
+    assert len(augmented_audio.frame_data) == len(audio.frame_data) // 2
+    # Same seed, same variant
+    assert augmentation.augment(audio, operations, seed).frame_data == augmented_audio.frame_data
+    assert augmentation.augment(audio, operations, augmentation.get_seed(0, 'snr10', 'hello2.wav')).frame_data != augmented_audio.frame_data
+
+
+def test_get_seed_ignores_the_folder():
+    assert augmentation.get_seed(1, 'snr10', 'a/hello.wav') == augmentation.get_seed(1, 'snr10', 'b\\hello.wav')
+    assert augmentation.get_seed(1, 'snr10', 'hello.wav') != augmentation.get_seed(1, 'snr5', 'hello.wav')
+
+
+def test_parsing_the_variants_does_not_import_numpy():
+    code = ('import configparser, sys, augmentation\n'
+            'settings = configparser.ConfigParser()\n'
+            'settings.read_string("[augmentation]\\nvariants = clean, snr10=noise:10\\n")\n'
+            'augmentation.get_variants(settings)\n'
+            'print("numpy" in sys.modules, "speech_recognition" in sys.modules)\n')
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(augmentation.__file__)))
+    assert output.decode('utf-8').split() == ['False', 'False']
@@ -0,0 +1,102 @@
+import configparser
+import os
+import time
+
+import pytest
+
+import benchmark
+import evaluation
+
+
+def make_settings():
+    settings = configparser.ConfigParser()
+    settings.read_string('''
+[general]
+metrics = wer,cer
+long_form_alignment_threshold = 100000
+gold_transcription_encoding = UTF-8
+predicted_transcription_encoding = UTF-8
+[adaptive_sampling]
+enabled = False
+[rover]
+enabled = True
+asr_systems =
+alpha = 1
+null_confidence = 0.5
+default_confidence = 0.5
+''')
+    return settings
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    '''
+    Speech files with a gold transcription and the transcriptions of google and ibm, for the clean and snr10 variants.
+    Returns a list of (speech file path, transcriptions) as returned by benchmark.transcribe_speech_file().
+    '''
+    monkeypatch.chdir(tmp_path)
+    gold_transcriptions = ['hello world', 'who is there', 'good morning to you', 'one two three']
+    corpus = []
+    for speech_file_number, gold_transcription in enumerate(gold_transcriptions):
+        speech_filepath = os.path.join(str(tmp_path), 'speech_{0}.wav'.format(speech_file_number))
+        with open(speech_filepath.replace('.wav', '_gold.txt'), 'w') as gold_transcription_file:
+            gold_transcription_file.write(gold_transcription)
+        words = gold_transcription.split()
+        transcriptions = {('google', 'clean'): gold_transcription, ('ibm', 'clean'): ' '.join(words[:-1]),
+                          ('google', 'snr10'): ' '.join(words[1:]), ('ibm', 'snr10'): ''}
+        for system, transcription in transcriptions.items():
+            with open(speech_filepath.replace('.wav', '_{0}.txt'.format(evaluation.get_system_filename_suffix(system))), 'w') as transcription_file:
+                transcription_file.write(transcription)
+        corpus.append((speech_filepath, transcriptions))
+    return corpus
+
+
+def read_file(filepath):
+    with open(filepath) as input_file:
+        return input_file.read()
+
+
+def test_fused_evaluation_gives_the_same_summary_as_the_two_pass_evaluation(corpus):
+    settings = make_settings()
+    corpus_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean', 'snr10'], settings)
+    for speech_filepath, transcriptions in corpus:
+        corpus_evaluation.add_speech_file(speech_filepath)
+    corpus_evaluation.close()
+    corpus_evaluation.write_summary('two_pass_summary.csv')
+    all_predicted_transcriptions = read_file('all_predicted_transcriptions_rover_snr10.txt')
+
+    fused_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean', 'snr10'], settings)
+    # Flush the summary after each speech file
+    score, stop = benchmark.start_scoring_consumer(fused_evaluation, 'fused_summary.csv', 0)
+    for speech_filepath, transcriptions in corpus:
+        score(speech_filepath, transcriptions)
+    stop()
+    fused_evaluation.close()
+    fused_evaluation.write_summary('fused_summary.csv')
+
+    assert fused_evaluation.number_of_speech_files == corpus_evaluation.number_of_speech_files == 4
+    assert fused_evaluation.number_of_edits == corpus_evaluation.number_of_edits
+    assert read_file('fused_summary.csv') == read_file('two_pass_summary.csv')
+    assert read_file('all_predicted_transcriptions_rover_snr10.txt') == all_predicted_transcriptions
+    assert not os.path.exists('fused_summary.csv.tmp')
+
+
+def test_scoring_errors_stop_the_run(corpus):
+    fused_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean', 'snr10'], make_settings())
+    score, stop = benchmark.start_scoring_consumer(fused_evaluation, 'fused_summary.csv', 60)
+    speech_filepath, transcriptions = corpus[0]
+    os.remove(speech_filepath.replace('.wav', '_gold.txt'))
+    score(speech_filepath, transcriptions)
+    with pytest.raises(IOError):
+        stop()
+    score, stop = benchmark.start_scoring_consumer(fused_evaluation, 'fused_summary.csv', 60)
+    score(speech_filepath, transcriptions)
+    # The next speech files aren't queued once the scoring has failed
+    deadline = time.time() + 10
+    with pytest.raises(IOError):
+        while time.time() < deadline:
+            score(*corpus[1])
+            time.sleep(0.01)
+    with pytest.raises(IOError):
+        stop()
+    fused_evaluation.close()
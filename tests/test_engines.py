@@ -0,0 +1,47 @@
+import configparser
+
+import pytest
+import requests
+
+import asr_speechmatics
+import engines
+
+
+@pytest.fixture
+def settings():
+    settings = configparser.ConfigParser()
+    settings['general'] = {'speech_language': 'en-US'}
+    settings['credentials'] = {'speechmatics_id': 'user', 'speechmatics_token': 'token'}
+    return settings
+
+
+def test_get_engine():
+    assert engines.get_engine('speechmatics') is asr_speechmatics
+    with pytest.raises(ValueError):
+        engines.get_engine('unknown')
+
+
+def test_speechmatics_could_not_be_reached(settings, tmp_path, monkeypatch):
+    speech_filepath = str(tmp_path / 'hello.wav')
+    with open(speech_filepath, 'wb') as speech_file:
+        speech_file.write(b'RIFF')
+
+    def post(*args, **kwargs):
+        raise requests.exceptions.ConnectionError('Name or service not known')
+
+    monkeypatch.setattr(requests, 'post', post)
+    assert asr_speechmatics.recognize(None, None, settings, speech_filepath) == ('', '', True)
+
+
+def test_speechmatics_invalid_credentials(settings, tmp_path, monkeypatch):
+    speech_filepath = str(tmp_path / 'hello.wav')
+    with open(speech_filepath, 'wb') as speech_file:
+        speech_file.write(b'RIFF')
+
+    class Response(object):
+        status_code = 401
+        text = ''
+
+    monkeypatch.setattr(requests, 'post', lambda *args, **kwargs: Response())
+    assert asr_speechmatics.recognize(None, None, settings, speech_filepath) == ('', '', True)
+
@@ -0,0 +1,138 @@
+import configparser
+import json
+import os
+
+import pytest
+
+import evaluation
+
+
+def make_settings(adaptive_sampling=False, rover=False, metrics='wer'):
+    settings = configparser.ConfigParser()
+    settings.read_string('''
+[general]
+metrics = {0}
+long_form_alignment_threshold = 100000
+gold_transcription_encoding = UTF-8
+predicted_transcription_encoding = UTF-8
+[adaptive_sampling]
+enabled = {1}
+[rover]
+enabled = {2}
+asr_systems =
+alpha = 1
+null_confidence = 0.5
+default_confidence = 0.5
+'''.format(metrics, adaptive_sampling, rover))
+    return settings
+
+
+def write_file(filepath, content):
+    with open(filepath, 'w') as output_file:
+        output_file.write(content)
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    '''
+    Three speech files with gold transcriptions, and the transcription files of google (all of them) and ibm (the first two).
+    Returns the speech file paths.
+    '''
+    # The evaluation writes the all_*_transcriptions.txt files in the working directory
+    monkeypatch.chdir(tmp_path)
+    transcriptions = [('hello world', 'hello word', 'hello world'),
+                      ('who is there', 'who is there', 'who was there'),
+                      ('good morning', 'good morning', None)]
+    speech_filepaths = []
+    for speech_file_number, (gold_transcription, google_transcription, ibm_transcription) in enumerate(transcriptions):
+        speech_filepath_base = os.path.join(str(tmp_path), 'speech_{0}'.format(speech_file_number))
+        write_file(speech_filepath_base + '_gold.txt', gold_transcription)
+        write_file(speech_filepath_base + '_google.txt', google_transcription)
+        if ibm_transcription is not None:
+            write_file(speech_filepath_base + '_ibm.txt', ibm_transcription)
+        speech_filepaths.append(speech_filepath_base + '.wav')
+    return speech_filepaths
+
+
+def test_evaluation(corpus):
+    corpus_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean'], make_settings(rover=True))
+    for speech_filepath in corpus:
+        corpus_evaluation.add_speech_file(speech_filepath)
+    corpus_evaluation.close()
+    assert corpus_evaluation.number_of_speech_files == 3
+    assert corpus_evaluation.get_corpus_scores(('google', 'clean'))['wer'] == pytest.approx(1 / 7)
+    # The missing ibm transcription counts as an empty transcription
+    assert corpus_evaluation.get_corpus_scores(('ibm', 'clean'))['wer'] == pytest.approx(3 / 7)
+    assert corpus_evaluation.number_of_missing_predicted_transcription_txt_files[('ibm', 'clean')] == 1
+    # Ties are broken in favor of google
+    assert corpus_evaluation.get_corpus_scores(('rover', 'clean'))['wer'] == pytest.approx(1 / 7)
+
+
+def test_evaluation_of_an_adaptive_sample(corpus):
+    sampled_speech_filepaths = {('google', 'clean'): {corpus[0], corpus[1]}, ('ibm', 'clean'): {corpus[0]}}
+    corpus_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean'], make_settings(adaptive_sampling=True), sampled_speech_filepaths)
+    for speech_filepath in corpus:
+        corpus_evaluation.add_speech_file(speech_filepath)
+    corpus_evaluation.close()
+    # speech_2 wasn't sampled, even though a google transcription file exists
+    assert corpus_evaluation.number_of_speech_files == 2
+    assert [stats['file'] for stats in corpus_evaluation.all_stats[('google', 'clean')]] == corpus[:2]
+    assert [stats['file'] for stats in corpus_evaluation.all_stats[('ibm', 'clean')]] == corpus[:1]
+    assert corpus_evaluation.number_of_missing_predicted_transcription_txt_files == {('google', 'clean'): 0, ('ibm', 'clean'): 0}
+    assert corpus_evaluation.get_corpus_scores(('google', 'clean'))['wer'] == pytest.approx(1 / 5)
+    assert corpus_evaluation.get_corpus_scores(('ibm', 'clean'))['wer'] == 0
+
+
+def test_evaluation_with_adaptive_sampling_only_counts_existing_transcriptions(corpus):
+    corpus_evaluation = evaluation.Evaluation(['google', 'ibm'], ['clean'], make_settings(adaptive_sampling=True))
+    for speech_filepath in corpus:
+        corpus_evaluation.add_speech_file(speech_filepath)
+    corpus_evaluation.close()
+    assert len(corpus_evaluation.all_stats[('ibm', 'clean')]) == 2
+    assert corpus_evaluation.number_of_missing_predicted_transcription_txt_files[('ibm', 'clean')] == 0
+
+
+def google_response(*alternatives):
+    return {'alternative': [dict({'transcript': transcript}, **({'confidence': confidence} if confidence is not None else {}))
+                            for transcript, confidence in alternatives], 'final': True}
+
+
+def write_json(filepath, content):
+    with open(filepath, 'w') as output_file:
+        json.dump(content, output_file)
+
+
+def test_asr_responses_of_a_segmented_speech_file(tmp_path):
+    json_filepath = str(tmp_path / 'speech_0_google.json')
+    write_json(json_filepath, {'transcription': 'hello word', 'transcription_json': None, 'chunks': [
+        {'transcription': 'hello', 'transcription_json': google_response(('hello', 0.9))},
+        {'transcription': '', 'transcription_json': []},
+        {'transcription': 'big word', 'transcription_json': google_response(('big word', 0.6), ('big world', None))}]})
+    settings = make_settings()
+    asr_responses = evaluation.read_asr_responses(json_filepath, settings)
+    assert [transcription for transcription, transcription_json in asr_responses] == ['hello', '', 'big word']
+    assert evaluation.read_alternatives('google', asr_responses) == ['hello big word', 'hello big world']
+    # Weighted by the number of words of each chunk
+    assert evaluation.read_confidence('google', asr_responses) == pytest.approx((0.9 + 2 * 0.6) / 3)
+
+
+def test_asr_responses_of_a_speech_file(tmp_path):
+    json_filepath = str(tmp_path / 'speech_0_google.json')
+    write_json(json_filepath, {'transcription': 'hello word', 'transcription_json': google_response(('hello word', 0.8), ('hello world', None))})
+    settings = make_settings()
+    asr_responses = evaluation.read_asr_responses(json_filepath, settings)
+    assert evaluation.read_alternatives('google', asr_responses) == ['hello word', 'hello world']
+    assert evaluation.read_confidence('google', asr_responses) == 0.8
+    assert evaluation.read_asr_responses(str(tmp_path / 'speech_1_google.json'), settings) == []
+    assert evaluation.read_alternatives('google', []) == []
+    assert evaluation.read_confidence('google', []) is None
+
+
+def test_oracle_wer_of_a_segmented_speech_file(corpus):
+    write_json(corpus[0].replace('.wav', '_google.json'), {'transcription': 'hello word', 'transcription_json': None, 'chunks': [
+        {'transcription': 'hello', 'transcription_json': google_response(('hello', 0.9))},
+        {'transcription': 'word', 'transcription_json': google_response(('word', 0.5), ('world', 0.4))}]})
+    corpus_evaluation = evaluation.Evaluation(['google'], ['clean'], make_settings(metrics='wer,oracle_wer'))
+    corpus_evaluation.add_speech_file(corpus[0])
+    corpus_evaluation.close()
+    assert corpus_evaluation.get_corpus_scores(('google', 'clean')) == {'wer': 0.5, 'oracle_wer': 0}
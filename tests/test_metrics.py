@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+import metrics
+
+
+def test_compute_metrics_from_a_single_alignment():
+    scores = metrics.compute_metrics('who is there', 'is there a cat', ['wer', 'mer', 'wil', 'cer'])
+    # who is there -> (who deleted) is there (a cat inserted)
+    assert (scores['corrects'], scores['substitutions'], scores['deletions'], scores['insertions']) == (2, 0, 1, 2)
+    assert scores['wer'] == 3 / 3
+    assert scores['mer'] == 3 / 5
+    assert scores['wil'] == 1 - (2 / 3) * (2 / 4)
+    assert scores['cer'] == metrics.levenshtein_distance('who is there', 'is there a cat') / len('who is there')
+
+
+def test_compute_metrics_matches_wer():
+    gold_transcription = 'blue had range of okay'
+    predicted_transcription = 'blue hydrangea bouquet'
+    scores = metrics.compute_metrics(gold_transcription, predicted_transcription, ['wer'])
+    edits = metrics.wer(gold_transcription.split(' '), predicted_transcription.split(' '))
+    for edit_type in ['changes', 'corrects', 'substitutions', 'insertions', 'deletions']:
+        assert scores[edit_type] == edits[edit_type]
+    assert scores['wer'] == edits['changes'] / 5
+
+
+def test_aggregate_metrics_sums_the_counts_over_the_corpus():
+    counts = {}
+    for gold_transcription, predicted_transcription in [('who is there', 'who is there'), ('hello world', 'hello')]:
+        for count_type, count in metrics.compute_metrics(gold_transcription, predicted_transcription, ['wer', 'cer']).items():
+            counts[count_type] = counts.get(count_type, 0) + count
+    corpus_scores = metrics.aggregate_metrics(counts, ['wer', 'cer'])
+    assert corpus_scores['wer'] == 1 / 5
+    assert corpus_scores['cer'] == 6 / (len('who is there') + len('hello world'))
+
+
+def test_compute_metrics_rejects_unknown_metrics():
+    with pytest.raises(ValueError):
+        metrics.compute_metrics('a', 'a', ['bleu'])
+
+
+def random_token_lists(random_generator, number_of_pairs, max_length, vocabulary_size):
+    for _ in range(number_of_pairs):
+        ref = [str(random_generator.randrange(vocabulary_size)) for _ in range(random_generator.randint(1, max_length))]
+        hyp = [str(random_generator.randrange(vocabulary_size)) for _ in range(random_generator.randint(0, max_length))]
+        yield ref, hyp
+
+
+@pytest.mark.parametrize('small_problem_size', [1, 7, 50, 100000])
+def test_wer_long_form_has_the_same_edit_counts_as_wer(small_problem_size):
+    # A small vocabulary gives many equally good alignments, where only the tie-breaking decides the edit types
+    for ref, hyp in random_token_lists(random.Random(small_problem_size), 500, 40, 3):
+        assert metrics.wer_long_form(ref, hyp, small_problem_size) == metrics.wer(ref, hyp)
+
+
+def test_wer_long_form_on_a_long_transcript():
+    random_generator = random.Random(0)
+    ref = [str(random_generator.randrange(20)) for _ in range(600)]
+    hyp = [token if random_generator.random() < 0.8 else str(random_generator.randrange(20)) for token in ref]
+    del hyp[::17]
+    assert metrics.wer_long_form(ref, hyp, small_problem_size=1000) == metrics.wer(ref, hyp)
+
+
+def test_align_switches_to_the_long_form_mode_above_the_threshold(monkeypatch):
+    ref = 'who is there'.split() * 10
+    hyp = 'who was there'.split() * 10
+    long_form_alignments = []
+    wer_long_form = metrics.wer_long_form
+    monkeypatch.setattr(metrics, 'wer_long_form', lambda ref, hyp: long_form_alignments.append(len(hyp)) or wer_long_form(ref, hyp))
+    assert metrics.align(ref, hyp, long_form_alignment_threshold=5) == metrics.wer(ref, hyp)
+    assert metrics.align(ref, hyp, long_form_alignment_threshold=0) == metrics.wer(ref, hyp)
+    assert metrics.align(ref, hyp, long_form_alignment_threshold=30) == metrics.wer(ref, hyp)
+    assert metrics.align(ref, hyp, reference=metrics.PreparedReference(ref)) == metrics.wer(ref, hyp)
+    assert long_form_alignments == [30]
+    # compute_metrics() and wer_many() go through align()
+    metrics.compute_metrics(' '.join(ref), ' '.join(hyp), long_form_alignment_threshold=5)
+    metrics.wer_many(ref, [hyp, hyp[:3]], long_form_alignment_threshold=5)
+    assert long_form_alignments == [30, 30, 30, 3]
+
+
+def test_prepared_reference_distance_matches_wer():
+    for ref, hyp in random_token_lists(random.Random(1), 500, 30, 4):
+        assert metrics.PreparedReference(ref).distance(hyp) == metrics.wer(ref, hyp)['changes']
+
+
+def test_prepared_reference_edit_counts_match_wer():
+    for ref, hyp in random_token_lists(random.Random(2), 500, 30, 3):
+        assert metrics.PreparedReference(ref).edit_counts(hyp) == metrics.wer(ref, hyp)
+
+
+def test_prepared_reference_on_more_than_64_tokens():
+    # The bit vectors are Python integers, so references longer than a machine word work the same way
+    for ref, hyp in random_token_lists(random.Random(3), 20, 200, 10):
+        assert metrics.PreparedReference(ref).edit_counts(hyp) == metrics.wer(ref, hyp)
+
+
+def test_prepared_reference_on_characters():
+    assert metrics.PreparedReference('kitten').distance('sitting') == 3
+    assert metrics.PreparedReference('').distance('abc') == 3
+
+
+def test_wer_many_returns_the_oracle():
+    ref = 'who is there'.split()
+    hyps = ['is there a cat'.split(), 'who is there'.split(), 'who is cat'.split()]
+    edits, oracle_index = metrics.wer_many(ref, hyps)
+    assert [edit['changes'] for edit in edits] == [3, 0, 1]
+    assert oracle_index == 1
+    assert metrics.wer_many(ref, []) == ([], None)
+
+
+def test_oracle_wer_uses_the_best_alternative():
+    scores = metrics.compute_metrics('who is there', 'who was their', ['wer', 'oracle_wer'], alternatives=['who is their', 'how is there'])
+    assert scores['wer'] == 2 / 3
+    assert scores['oracle_wer'] == 1 / 3
+
+
+def test_compute_metrics_many_prepares_the_gold_transcription_once(monkeypatch):
+    prepared_references = []
+    PreparedReference = metrics.PreparedReference
+
+    class CountingPreparedReference(PreparedReference):
+        def __init__(self, ref):
+            prepared_references.append(ref)
+            PreparedReference.__init__(self, ref)
+
+    monkeypatch.setattr(metrics, 'PreparedReference', CountingPreparedReference)
+    all_scores = metrics.compute_metrics_many('who is there', ['who was their', 'who is there', ''], ['wer', 'oracle_wer'],
+                                              alternatives=[['who is their', 'how is there'], [], ['who']])
+    assert prepared_references == ['who is there'.split()]
+    assert [scores['changes'] for scores in all_scores] == [2, 0, 3]
+    assert [scores['oracle_changes'] for scores in all_scores] == [1, 0, 2]
@@ -0,0 +1,101 @@
+import os
+
+import pcm_cache
+
+
+def make_speech_files(folder, number_of_speech_files):
+    speech_filepaths = []
+    for speech_file_number in range(number_of_speech_files):
+        speech_filepath = os.path.join(str(folder), 'speech_{0}.wav'.format(speech_file_number))
+        with open(speech_filepath, 'wb') as speech_file:
+            speech_file.write(b'RIFF')
+        speech_filepaths.append(speech_filepath)
+    return speech_filepaths
+
+
+def test_put_and_get(tmp_path):
+    speech_filepath, = make_speech_files(tmp_path, 1)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    assert cache.get(speech_filepath) is None
+    assert cache.put(speech_filepath, b'\x01\x02' * 10) == b'\x01\x02' * 10
+    assert bytes(cache.get(speech_filepath)) == b'\x01\x02' * 10
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    speech_filepaths = make_speech_files(tmp_path, 11)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    for speech_file_number, speech_filepath in enumerate(speech_filepaths[:10]):
+        cache.put(speech_filepath, bytes([speech_file_number]) * 100)
+    # speech_0 is used again, so speech_1 and speech_2 are now the least recently used entries
+    cache.get(speech_filepaths[0])
+    # The cache is full: the data file is compacted, after evicting entries down to COMPACTION_TARGET of the maximum size
+    cache.put(speech_filepaths[10], bytes([10]) * 100)
+    assert cache.get(speech_filepaths[1]) is None
+    assert cache.get(speech_filepaths[2]) is None
+    for speech_file_number in [0] + list(range(3, 11)):
+        assert bytes(cache.get(speech_filepaths[speech_file_number])) == bytes([speech_file_number]) * 100
+    assert cache.get_size() == 900
+    assert os.path.getsize(cache.data_filepath) == 900
+
+
+def test_the_data_file_stays_within_the_maximum_size(tmp_path):
+    speech_filepaths = make_speech_files(tmp_path, 100)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    for speech_file_number, speech_filepath in enumerate(speech_filepaths):
+        cache.put(speech_filepath, bytes([speech_file_number]) * 100)
+        assert os.path.getsize(cache.data_filepath) <= 1000
+    assert bytes(cache.get(speech_filepaths[-1])) == bytes([99]) * 100
+
+
+def test_entries_larger_than_the_cache_are_not_cached(tmp_path):
+    speech_filepath, = make_speech_files(tmp_path, 1)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 10)
+    assert cache.put(speech_filepath, b'\x00' * 100) == b'\x00' * 100
+    assert cache.get(speech_filepath) is None
+
+
+def test_the_cache_persists_across_restarts(tmp_path):
+    speech_filepaths = make_speech_files(tmp_path, 2)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    cache.put(speech_filepaths[0], b'\x01' * 100)
+    cache.put(speech_filepaths[1], b'\x02' * 100)
+    cache.save_index()
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    assert bytes(cache.get(speech_filepaths[0])) == b'\x01' * 100
+    assert bytes(cache.get(speech_filepaths[1])) == b'\x02' * 100
+
+
+def test_a_modified_speech_file_is_not_read_from_the_cache(tmp_path):
+    speech_filepath, = make_speech_files(tmp_path, 1)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    cache.put(speech_filepath, b'\x01' * 100)
+    with open(speech_filepath, 'ab') as speech_file:
+        speech_file.write(b'WAVE')
+    assert cache.get(speech_filepath) is None
+
+
+def test_entries_past_the_end_of_a_truncated_data_file_are_dropped(tmp_path):
+    speech_filepaths = make_speech_files(tmp_path, 2)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    cache.put(speech_filepaths[0], b'\x01' * 100)
+    cache.put(speech_filepaths[1], b'\x02' * 100)
+    cache.save_index()
+    with open(cache.data_filepath, 'r+b') as data_file:
+        data_file.truncate(150)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 1000)
+    assert bytes(cache.get(speech_filepaths[0])) == b'\x01' * 100
+    assert cache.get(speech_filepaths[1]) is None
+
+
+def test_the_data_file_is_only_remapped_when_needed(tmp_path, monkeypatch):
+    speech_filepaths = make_speech_files(tmp_path, 50)
+    cache = pcm_cache.PcmCache(str(tmp_path / 'cache'), 100000)
+    remaps = []
+    original_remap = pcm_cache.PcmCache._remap
+    monkeypatch.setattr(pcm_cache.PcmCache, '_remap', lambda self: remaps.append(1) or original_remap(self))
+    for speech_file_number, speech_filepath in enumerate(speech_filepaths):
+        cache.put(speech_filepath, bytes([speech_file_number]) * 100)
+    assert len(remaps) == 0
+    for speech_file_number, speech_filepath in enumerate(speech_filepaths):
+        assert bytes(cache.get(speech_filepath)) == bytes([speech_file_number]) * 100
+    assert len(remaps) == 1
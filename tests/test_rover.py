@@ -0,0 +1,52 @@
+import metrics
+import rover
+
+
+def test_majority_vote():
+    assert rover.combine(['who is there', 'who was there', 'who is their']) == 'who is there'
+    assert rover.combine(['hello world', 'hello', 'hello big world']) == 'hello world'
+    assert rover.combine(['hello', 'hello', 'hello']) == 'hello'
+    assert rover.combine([]) == ''
+
+
+def test_ties_go_to_the_first_transcription():
+    assert rover.combine(['a b', 'c d']) == 'a b'
+    assert rover.combine(['c d', 'a b']) == 'c d'
+
+
+def test_insertions_are_kept_only_with_a_majority():
+    # "big" is proposed by 1 transcription out of 3, and loses against NULL
+    assert rover.combine(['hello world', 'hello world', 'hello big world']) == 'hello world'
+    assert rover.combine(['hello big world', 'hello big world', 'hello world']) == 'hello big world'
+
+
+def test_word_transition_network_slots():
+    network = rover.WordTransitionNetwork(null_confidence=0.3)
+    network.add_transcription('hello world'.split(), 0.9)
+    network.add_transcription('hello big world'.split(), 0.8)
+    network.add_transcription('hello'.split(), 0.7)
+    assert network.number_of_transcriptions == 3
+    assert network.slots == [{'hello': [0.9, 0.8, 0.7]},
+                             {rover.NULL: [0.3, 0.3], 'big': [0.8]},
+                             {'world': [0.9, 0.8], rover.NULL: [0.3]}]
+    assert network.vote() == ['hello', 'world']
+
+
+def test_confidence_weighting():
+    transcriptions = ['who is there', 'who was there', 'who was there']
+    assert rover.combine(transcriptions) == 'who was there'
+    # With alpha = 0, only the average confidence of each word counts
+    assert rover.combine(transcriptions, confidences=[0.9, 0.4, 0.5], alpha=0) == 'who is there'
+    # With alpha = 0.5: "is" scores 0.5/3 + 0.5*0.9 = 0.617, "was" scores 0.5*2/3 + 0.5*0.45 = 0.558
+    assert rover.combine(transcriptions, confidences=[0.9, 0.4, 0.5], alpha=0.5) == 'who is there'
+    assert rover.combine(transcriptions, confidences=[0.6, 0.5, 0.5], alpha=0.5) == 'who was there'
+    # Transcriptions without confidence get default_confidence
+    assert rover.combine(transcriptions, confidences=[0.9, None, None], alpha=0, default_confidence=0.1) == 'who is there'
+
+
+def test_token_set_reference():
+    reference = metrics.PreparedReference.from_token_sets([{'who', 'how'}, {'is'}, {'there', 'their'}])
+    assert reference.distance('how is their'.split()) == 0
+    assert reference.distance('who was there'.split()) == 1
+    assert reference.alignment('how is their cat'.split()) == [(0, 0), (1, 1), (2, 2), (None, 3)]
+    assert reference.alignment('is'.split()) == [(0, None), (1, 0), (2, None)]
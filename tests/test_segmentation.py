@@ -0,0 +1,65 @@
+import numpy
+import speech_recognition as sr
+
+import segmentation
+
+SAMPLE_RATE = 16000
+
+
+def make_audio(segments):
+    '''
+    segments: list of (duration_in_seconds, is_speech). Speech is a 440 Hz tone, silence is very low noise.
+    '''
+    random_generator = numpy.random.RandomState(0)
+    samples = []
+    for duration, is_speech in segments:
+        number_of_samples = int(duration * SAMPLE_RATE)
+        if is_speech:
+            samples.append(10000 * numpy.sin(2 * numpy.pi * 440 * numpy.arange(number_of_samples) / SAMPLE_RATE))
+        else:
+            samples.append(random_generator.normal(0, 10, number_of_samples))
+    samples = numpy.concatenate(samples).astype(numpy.int16)
+    return sr.AudioData(samples.tobytes(), SAMPLE_RATE, 2)
+
+
+def test_split_in_the_middle_of_silences():
+    # Speech 0-8 s, silence 8-9 s, speech 9-17 s, silence 17-18 s, speech 18-26 s
+    audio = make_audio([(8, True), (1, False), (8, True), (1, False), (8, True)])
+    chunks = segmentation.split_on_silence(audio, min_chunk_duration=2, max_chunk_duration=10)
+    boundaries = [chunk_end for chunk_start, chunk_end, chunk in chunks[:-1]]
+    assert len(chunks) == 3
+    assert abs(boundaries[0] - 8.5) < 0.1
+    assert abs(boundaries[1] - 17.5) < 0.1
+
+
+def test_chunks_cover_the_audio_without_overlap():
+    audio = make_audio([(8, True), (1, False), (8, True), (1, False), (8, True)])
+    chunks = segmentation.split_on_silence(audio, min_chunk_duration=2, max_chunk_duration=10)
+    assert chunks[0][0] == 0
+    assert abs(chunks[-1][1] - segmentation.get_audio_duration(audio)) < 1e-9
+    for (previous_start, previous_end, previous_chunk), (chunk_start, chunk_end, chunk) in zip(chunks[:-1], chunks[1:]):
+        assert previous_end == chunk_start
+    assert b''.join(chunk.frame_data for chunk_start, chunk_end, chunk in chunks) == audio.frame_data
+
+
+def test_chunks_are_as_long_as_possible():
+    # Silences every 3 s: with max_chunk_duration=10, the chunks are split at the last silence before 10 s
+    audio = make_audio([(2.5, True), (0.5, False)] * 8)
+    chunks = segmentation.split_on_silence(audio, min_chunk_duration=2, max_chunk_duration=10)
+    assert [round(chunk_end - chunk_start) for chunk_start, chunk_end, chunk in chunks] == [9, 9, 6]
+
+
+def test_split_at_the_quietest_frame_without_silence():
+    # A quieter passage, but no silence, between 14 and 14.3 s
+    samples = 10000 * numpy.sin(2 * numpy.pi * 440 * numpy.arange(30 * SAMPLE_RATE) / SAMPLE_RATE)
+    samples[14 * SAMPLE_RATE:int(14.3 * SAMPLE_RATE)] /= 4
+    audio = sr.AudioData(samples.astype(numpy.int16).tobytes(), SAMPLE_RATE, 2)
+    chunks = segmentation.split_on_silence(audio, min_chunk_duration=5, max_chunk_duration=20)
+    assert len(chunks) == 2
+    assert 14 <= chunks[0][1] <= 14.3
+
+
+def test_short_audio_is_not_split():
+    audio = make_audio([(3, True), (1, False), (3, True)])
+    chunks = segmentation.split_on_silence(audio, min_chunk_duration=2, max_chunk_duration=10)
+    assert len(chunks) == 1
@@ -0,0 +1,102 @@
+import configparser
+import http.client
+import json
+import os
+import threading
+import wave
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def settings():
+    settings = configparser.ConfigParser()
+    settings.read_string('''
+[general]
+asr_systems = google
+metrics = wer
+long_form_alignment_threshold = 100000
+gold_transcription_encoding = UTF-8
+predicted_transcription_encoding = UTF-8
+overwrite_non_empty_transcriptions = False
+overwrite_empty_transcriptions = False
+[service]
+max_workers = 2
+[pcm_cache]
+enabled = False
+''')
+    return settings
+
+
+def make_transcribed_speech_file(folder, gold_transcription, google_transcription):
+    '''
+    A one-second silent WAV file, with its gold transcription and an existing Google transcription, so that it isn't sent to the ASR API.
+    '''
+    speech_filepath = os.path.join(str(folder), 'hello.wav')
+    with wave.open(speech_filepath, 'wb') as speech_file:
+        speech_file.setnchannels(1)
+        speech_file.setsampwidth(2)
+        speech_file.setframerate(16000)
+        speech_file.writeframes(b'\x00\x00' * 16000)
+    with open(os.path.join(str(folder), 'hello_gold.txt'), 'w') as gold_transcription_file:
+        gold_transcription_file.write(gold_transcription)
+    with open(os.path.join(str(folder), 'hello_google.txt'), 'w') as google_transcription_file:
+        google_transcription_file.write(google_transcription)
+    return speech_filepath
+
+
+def test_submit_and_status(settings, tmp_path):
+    speech_filepath = make_transcribed_speech_file(tmp_path, 'Hello world', 'hello word')
+    job = service.Service(settings).submit({'files': [speech_filepath]})
+    results = list(job.iterate_results())
+    assert len(results) == 1
+    assert results[0]['transcription'] == 'hello word'
+    assert results[0]['transcription_skipped']
+    assert results[0]['wer'] == 0.5
+    status = job.get_status()
+    assert status['status'] == 'done'
+    assert status['number_of_done_transcriptions'] == 1
+    assert status['number_of_failed_transcriptions'] == 0
+    assert status['metrics']['google']['wer'] == 0.5
+
+
+@pytest.mark.parametrize('request_body', [[1], 'x', {'files': 'hello.wav'}, {'files': [1]}, {'asr_systems': 'google', 'files': []},
+                                          {'asr_systems': ['google'], 'folder': ['a']}, {'asr_systems': ['unknown'], 'files': []}, {}])
+def test_malformed_requests_are_rejected(settings, request_body):
+    with pytest.raises(ValueError):
+        service.Service(settings).submit(request_body)
+
+
+@pytest.fixture
+def http_server(settings):
+    http_server = service.ThreadingHTTPServer(('localhost', 0), service.make_request_handler(service.Service(settings)))
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def post(http_server, body):
+    connection = http.client.HTTPConnection('localhost', http_server.server_address[1], timeout=10)
+    connection.request('POST', '/jobs', body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read().decode('utf-8'))
+
+
+def test_http_api(http_server, tmp_path):
+    speech_filepath = make_transcribed_speech_file(tmp_path, 'hello world', 'hello world')
+    status_code, content = post(http_server, json.dumps({'files': [speech_filepath]}))
+    assert status_code == 201
+    connection = http.client.HTTPConnection('localhost', http_server.server_address[1], timeout=10)
+    connection.request('GET', '/jobs/{0}/results'.format(content['job_id']))
+    results = [json.loads(line) for line in connection.getresponse().read().decode('utf-8').splitlines()]
+    assert [result['wer'] for result in results] == [0]
+
+
+@pytest.mark.parametrize('body', ['[1]', '"x"', 'not json', '{"files": "hello.wav"}'])
+def test_http_api_rejects_malformed_bodies(http_server, body):
+    status_code, content = post(http_server, body)
+    assert status_code == 400
+    assert 'error' in content
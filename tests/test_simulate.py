@@ -0,0 +1,65 @@
+import configparser
+import os
+
+import pytest
+
+import simulate
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'simulation')
+
+
+@pytest.fixture
+def settings():
+    settings = configparser.ConfigParser()
+    settings.read_string('[general]\npredicted_transcription_encoding = UTF-8\n')
+    return settings
+
+
+def test_load_records(settings):
+    records = simulate.load_records([DATA_FOLDER], ['google', 'ibm'], settings)
+    # hello_google.json was saved before asr_could_not_be_reached existed: it counts as a successful request
+    assert sorted(records['google']) == [[(1.0, False)], [(1.0, False), (3.0, False), (2.0, False)]]
+    assert records['ibm'] == [[(2.0, True)]]
+
+
+def test_engine_model(settings):
+    records = simulate.load_records([DATA_FOLDER], ['google', 'ibm'], settings)
+    assert simulate.EngineModel(records['google']).error_rate == 0
+    assert simulate.EngineModel(records['ibm']).error_rate == 1
+    assert simulate.EngineModel(records['google']).get_latency_percentile(50) == 2.0
+
+
+def test_simulate_sequential(settings):
+    records = simulate.load_records([DATA_FOLDER], ['google', 'ibm'], settings)
+    engine_models = {'ibm': simulate.EngineModel(records['ibm'])}
+    # One request of 2 s per speech file, and 1 s between speech files
+    wall_time, time_per_asr_system = simulate.simulate_sequential(engine_models, 10, 1, 8)
+    assert time_per_asr_system == {'ibm': 20.0}
+    assert wall_time == 30.0
+
+
+def test_simulate_sequential_sends_the_chunks_in_parallel():
+    engine_models = {'google': simulate.EngineModel([[(1.0, False), (3.0, False), (2.0, False)]])}
+    assert simulate.simulate_sequential(engine_models, 1, 0, 8)[0] == 3.0
+    # With 2 threads: the third chunk starts when the first one is done, at 1 s
+    assert simulate.simulate_sequential(engine_models, 1, 0, 2)[0] == 3.0
+    assert simulate.simulate_sequential(engine_models, 1, 0, 1)[0] == 6.0
+
+
+def test_simulate_concurrency_and_rate_limit():
+    engine_models = {'google': simulate.EngineModel([[(1.0, False)]])}
+    assert simulate.simulate(engine_models, 8, 1, 0, 0, 1)['google']['makespan'] == 8.0
+    assert simulate.simulate(engine_models, 8, 4, 0, 0, 1)['google']['makespan'] == 2.0
+    # At most one request started every 2 seconds
+    assert simulate.simulate(engine_models, 8, 4, 0.5, 0, 1)['google']['makespan'] == 15.0
+
+
+def test_simulate_retries(settings):
+    records = simulate.load_records([DATA_FOLDER], ['ibm'], settings)
+    engine_models = {'ibm': simulate.EngineModel(records['ibm'])}
+    prediction = simulate.simulate(engine_models, 1, 1, 0, 2, 1)['ibm']
+    # 2 s, backoff 1 s, 2 s, backoff 2 s, 2 s
+    assert prediction['makespan'] == 9.0
+    assert prediction['number_of_requests'] == 3
+    assert prediction['number_of_retries'] == 2
+    assert prediction['number_of_failed_files'] == 1
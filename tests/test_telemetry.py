@@ -0,0 +1,98 @@
+import configparser
+import http.client
+import os
+import subprocess
+import sys
+
+import telemetry
+
+
+def make_settings(prometheus_textfile='', http_port=0):
+    settings = configparser.ConfigParser()
+    settings['telemetry'] = {'prometheus_textfile': prometheus_textfile, 'textfile_update_interval_in_seconds': '60', 'http_port': str(http_port)}
+    return settings
+
+
+def test_render():
+    run_telemetry = telemetry.Telemetry()
+    run_telemetry.add_planned_transcriptions(4)
+    run_telemetry.record_transcription('google', 'completed')
+    run_telemetry.record_transcription('google', 'failed')
+    run_telemetry.record_transcription('ibm', 'skipped')
+    run_telemetry.request_started('google', 32000)
+    run_telemetry.request_started('google', 16000)
+    run_telemetry.request_ended('google', 0.3)
+    run_telemetry.request_ended('google', 7)
+    lines = run_telemetry.render().splitlines()
+    for line in ['# TYPE asr_benchmark_transcriptions_total counter',
+                 'asr_benchmark_transcriptions_total{asr_system="google",status="completed"} 1',
+                 'asr_benchmark_transcriptions_total{asr_system="google",status="failed"} 1',
+                 'asr_benchmark_transcriptions_total{asr_system="ibm",status="skipped"} 1',
+                 'asr_benchmark_requests_in_flight{asr_system="google"} 0',
+                 'asr_benchmark_pcm_bytes_total{asr_system="google"} 48000',
+                 '# TYPE asr_benchmark_request_duration_seconds histogram',
+                 'asr_benchmark_request_duration_seconds_bucket{asr_system="google",le="0.25"} 0',
+                 'asr_benchmark_request_duration_seconds_bucket{asr_system="google",le="0.5"} 1',
+                 'asr_benchmark_request_duration_seconds_bucket{asr_system="google",le="5"} 1',
+                 'asr_benchmark_request_duration_seconds_bucket{asr_system="google",le="10"} 2',
+                 'asr_benchmark_request_duration_seconds_bucket{asr_system="google",le="+Inf"} 2',
+                 'asr_benchmark_request_duration_seconds_sum{asr_system="google"} 7.3',
+                 'asr_benchmark_request_duration_seconds_count{asr_system="google"} 2',
+                 'asr_benchmark_planned_transcriptions 4']:
+        assert line in lines
+    # Each metric has a HELP and a TYPE line, and each sample line is a name, optional labels and a number
+    for line in lines:
+        if line.startswith('#'):
+            assert line.split()[1] in ['HELP', 'TYPE']
+        else:
+            name, value = line.rsplit(' ', 1)
+            assert name.startswith('asr_benchmark_')
+            float(value)
+    eta_line, = [line for line in lines if line.startswith('asr_benchmark_eta_seconds ')]
+    assert float(eta_line.split()[1]) > 0
+
+
+def test_render_without_requests():
+    assert telemetry.Telemetry().render().splitlines()[-1].startswith('asr_benchmark_transcriptions_per_second 0')
+
+
+def test_textfile_exporter(tmp_path):
+    run_telemetry = telemetry.Telemetry()
+    textfile_filepath = str(tmp_path / 'asr_benchmark.prom')
+    stop = telemetry.start_exporters(make_settings(prometheus_textfile=textfile_filepath), run_telemetry)
+    run_telemetry.record_transcription('google', 'completed')
+    stop()
+    with open(textfile_filepath) as textfile:
+        assert 'asr_benchmark_transcriptions_total{asr_system="google",status="completed"} 1\n' in textfile.read()
+    assert os.listdir(str(tmp_path)) == ['asr_benchmark.prom']
+
+
+def test_http_exporter():
+    import socket
+    with socket.socket() as free_socket:
+        free_socket.bind(('localhost', 0))
+        http_port = free_socket.getsockname()[1]
+    run_telemetry = telemetry.Telemetry()
+    run_telemetry.record_transcription('google', 'completed')
+    stop = telemetry.start_exporters(make_settings(http_port=http_port), run_telemetry)
+    try:
+        connection = http.client.HTTPConnection('localhost', http_port, timeout=10)
+        connection.request('GET', '/metrics')
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader('Content-Type').startswith('text/plain; version=0.0.4')
+        assert 'asr_benchmark_transcriptions_total{asr_system="google",status="completed"} 1\n' in response.read().decode('utf-8')
+        connection.request('GET', '/other')
+        assert connection.getresponse().status == 404
+    finally:
+        stop()
+
+
+def test_http_server_is_not_imported_without_http_endpoint():
+    code = ('import configparser, sys, telemetry\n'
+            'settings = configparser.ConfigParser()\n'
+            'settings.read_string("[telemetry]\\nprometheus_textfile =\\ntextfile_update_interval_in_seconds = 60\\nhttp_port = 0\\n")\n'
+            'telemetry.start_exporters(settings)()\n'
+            'print("http.server" in sys.modules)\n')
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(telemetry.__file__)))
+    assert output.decode('utf-8').strip() == 'False'